@@ -0,0 +1 @@
+"""Benchmarks for the Swell Forecast integration."""
@@ -0,0 +1,193 @@
+"""Local stand-in for the Open-Meteo marine API.
+
+Serves synthetic responses shaped like the real API, or a recorded response
+re-labelled with the requested coordinates, so the integration can be
+benchmarked without network access.
+"""
+
+from datetime import datetime, timedelta
+import json
+import math
+
+from aiohttp import web  # type: ignore
+
+from custom_components.swell_forecast.const import CURRENT_VARIABLES, HOURLY_VARIABLES
+
+RESOLUTION_HOURS = {
+    "hourly_1": 1,
+    "hourly_3": 3,
+    "hourly_6": 6,
+    "hourly": 1,
+}
+
+# How each variable the integration may request varies over the forecast:
+# (mean, amplitude, period in hours, unit), where a unit of None is the length unit
+VARIABLE_SHAPES = {
+    "wave_height": (1.2, 0.8, 11, None),
+    "swell_wave_height": (0.8, 0.6, 13, None),
+    "wind_wave_height": (0.4, 0.3, 7, None),
+    "wave_period": (9, 3, 17, "s"),
+    "swell_wave_period": (11, 3, 19, "s"),
+    "wave_direction": (210, 40, 23, "°"),
+    "swell_wave_direction": (200, 30, 29, "°"),
+}
+
+def synthetic_location(
+    latitude,
+    longitude,
+    days=5,
+    resolution="hourly_3",
+    start=None,
+    length_unit="metric",
+    hourly=HOURLY_VARIABLES,
+    current=CURRENT_VARIABLES
+):
+    """Build a synthetic marine API response for a single location.
+
+    Only the requested variables are included, and the integration requests
+    no daily block, so the payload matches what the API sends it.
+
+    Args:
+        latitude (float): The latitude of the location.
+        longitude (float): The longitude of the location.
+        days (int): The number of forecast days.
+        resolution (str): The temporal resolution, such as "hourly_3".
+        start (datetime): The first forecast hour, midnight today by default.
+        length_unit (str): "metric" or "imperial".
+        hourly (Sequence): The hourly variables, as built by api.build_params.
+        current (Sequence): The current variables, as built by api.build_params.
+
+    Returns:
+        dict: The response, in the format of the marine API.
+
+    """
+
+    if start is None:
+        start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)  # noqa: DTZ005
+    step = RESOLUTION_HOURS.get(resolution, 1)
+    metric = "ft" if length_unit == "imperial" else "m"
+    scale = 3.28084 if metric == "ft" else 1
+    phase = (latitude + longitude) % 6
+    hours = range(0, days * 24, step)
+
+    def series(variable):
+        mean, amplitude, period, unit = VARIABLE_SHAPES[variable]
+        factor = scale if unit is None else 1
+        return [round(factor * (mean + amplitude * math.sin(hour / period + phase)), 2) for hour in hours]
+
+    def units(variables):
+        return {variable: VARIABLE_SHAPES[variable][3] or metric for variable in variables}
+
+    hourly_data = {"time": [(start + timedelta(hours=hour)).strftime("%Y-%m-%dT%H:%M") for hour in hours]}
+    for variable in hourly:
+        hourly_data[variable] = series(variable)
+    current_data = {"time": hourly_data["time"][0], "interval": 900}
+    for variable in current:
+        current_data[variable] = hourly_data[variable][0] if variable in hourly_data else series(variable)[0]
+    return {
+        "latitude": round(latitude, 2),
+        "longitude": round(longitude, 2),
+        "generationtime_ms": 0.5,
+        "utc_offset_seconds": 0,
+        "timezone": "GMT",
+        "timezone_abbreviation": "GMT",
+        "elevation": 0.0,
+        "current_units": {"time": "iso8601", "interval": "seconds", **units(current)},
+        "current": current_data,
+        "hourly_units": {"time": "iso8601", **units(hourly)},
+        "hourly": hourly_data
+    }
+
+class MarineApiServer:
+    """A local aiohttp server answering marine API requests.
+
+    The forecast size can be fixed with days and resolution, whatever the
+    request asks for, so the integration's own parameters can be benchmarked
+    at other horizons.
+    """
+
+    def __init__(self, days=None, resolution=None, recorded=None):
+        """Initialize the server.
+
+        Args:
+            days (int): Serve this many forecast days, or the requested number.
+            resolution (str): Serve this resolution, or the requested one.
+            recorded (dict): A recorded single-location response to serve.
+
+        """
+
+        self.days = days
+        self.resolution = resolution
+        self.recorded = recorded
+        self.requests = 0
+        self.bytes_sent = 0
+        self.url = None
+        self._runner = None
+        self._cache = {}
+
+    async def __aenter__(self):
+        """Start the server on a free local port."""
+        app = web.Application()
+        app.router.add_get("/v1/marine", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/v1/marine"
+        return self
+
+    async def __aexit__(self, *exc_info):
+        """Stop the server."""
+        await self._runner.cleanup()
+
+    def reset(self):
+        """Reset the request counters."""
+        self.requests = 0
+        self.bytes_sent = 0
+
+    def location(self, latitude, longitude, days, resolution, length_unit, hourly, current):
+        """Get the response of a single location."""
+        if self.recorded is not None:
+            data = dict(self.recorded)
+            data["latitude"] = round(latitude, 2)
+            data["longitude"] = round(longitude, 2)
+            return data
+        key = (latitude, longitude, days, resolution, length_unit, hourly, current)
+        if key not in self._cache:
+            self._cache[key] = synthetic_location(
+                latitude, longitude, days, resolution, length_unit=length_unit, hourly=hourly, current=current
+            )
+        return self._cache[key]
+
+    async def _handle(self, request):
+        """Answer a single or multi-location request."""
+        query = request.query
+        try:
+            latitudes = [float(value) for value in query["latitude"].split(",")]
+            longitudes = [float(value) for value in query["longitude"].split(",")]
+        except (KeyError, ValueError):
+            return web.json_response({"error": True, "reason": "Invalid coordinates"}, status=400)
+        if len(latitudes) != len(longitudes):
+            return web.json_response({"error": True, "reason": "Coordinate count mismatch"}, status=400)
+
+        days = self.days or int(query.get("forecast_days", 7))
+        resolution = self.resolution or query.get("temporal_resolution", "hourly")
+        length_unit = query.get("length_unit", "metric")
+        hourly = _variables(query, "hourly", HOURLY_VARIABLES)
+        current = _variables(query, "current", CURRENT_VARIABLES)
+        if any(variable not in VARIABLE_SHAPES for variable in hourly + current):
+            return web.json_response({"error": True, "reason": "Unknown variable"}, status=400)
+        data = [
+            self.location(latitude, longitude, days, resolution, length_unit, hourly, current)
+            for latitude, longitude in zip(latitudes, longitudes)
+        ]
+        body = json.dumps(data[0] if len(data) == 1 else data).encode()
+        self.requests += 1
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type="application/json")
+
+def _variables(query, name, default):
+    """Get the variables of a request, sent as repeated or comma separated values."""
+    values = [variable for value in query.getall(name, []) for variable in value.split(",") if variable]
+    return tuple(values) if values else tuple(default)
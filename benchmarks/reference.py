@@ -0,0 +1,68 @@
+"""Older forecast helpers, kept as the baseline of the pipeline benchmark.
+
+The integration now builds its day slots and optimal waves with
+ParsedForecast; these are the per-slot dict implementations it replaced.
+"""
+
+from custom_components.swell_forecast.columns import load_columns
+from custom_components.swell_forecast.scoring import get_wave_score
+
+def optimal_wave(forecast, wave):
+    """Find the biggest wave and swell of a day.
+
+    Args:
+        forecast (list): The forecast slots of the day.
+        wave (dict): The marine API response, for the height units.
+
+    Returns:
+        dict: The height, time and score of the biggest wave and swell.
+
+    """
+
+    max_wave = None
+    max_swell = None
+    max_wave_height = 0
+    max_wave_time = 0
+    max_swell_height = 0
+    max_swell_time = 0
+    wave_height_metric = wave["hourly_units"]["wave_height"]
+    swell_height_metric = wave["hourly_units"]["swell_wave_height"]
+    for hourly in forecast:
+        wave_height = hourly["wave_height"]
+        swell_height = hourly["swell_height"]
+        if wave_height > max_wave_height:
+            max_wave_height = wave_height
+            max_wave_time = hourly["time"]
+            max_wave = str(wave_height) +  wave_height_metric + " @ " + hourly["time"]
+        if swell_height > max_swell_height:
+            max_swell_height = swell_height
+            max_swell_time = hourly["time"]
+            max_swell = str(swell_height) +  swell_height_metric + " @ " + hourly["time"]
+    return {
+        "wave": {
+            "max_height": max_wave_height,
+            "max_time": max_wave_time,
+            "max": max_wave,
+            "score": get_wave_score(max_wave_height, wave_height_metric)
+        },
+        "swell": {
+            "max_height": max_swell_height,
+            "max_time": max_swell_time,
+            "max": max_swell,
+            "score": get_wave_score(max_swell_height, swell_height_metric)
+        }
+    }
+
+def split_forecast(forecast):
+    """Split the hourly forecast into per-day lists of slots.
+
+    Args:
+        forecast (dict): The marine API response.
+
+    Returns:
+        dict: The forecast slots of each day, keyed by 'YYYYMMDD' date key.
+
+    """
+
+    hourly = forecast["hourly"]
+    return load_columns(hourly["time"], hourly["wave_height"], hourly["swell_wave_height"]).split()
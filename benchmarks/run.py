@@ -0,0 +1,203 @@
+"""Benchmark the Swell Forecast integration against a local marine API.
+
+Runs the forecast pipeline (ParsedForecast as used by the coordinator, the
+older split_forecast and optimal_wave helpers in benchmarks.reference and
+the scoring functions) and full coordinator refreshes over synthetic or
+recorded payloads, and reports latency, allocations and throughput.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --days 5 16 --resolution hourly_3 hourly_1 --locations 1 10 100 500
+    python -m benchmarks.run --payload recorded.json --json bench_output.json
+
+Both benchmarks import the integration, so Home Assistant must be
+installed. The coordinator benchmark also needs
+pytest-homeassistant-custom-component; use --skip-update to only run the
+pipeline benchmark.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+
+from custom_components.swell_forecast.forecast import ParsedForecast
+from custom_components.swell_forecast.model import MarineForecast
+from custom_components.swell_forecast.scoring import get_wave_score, get_wave_scores
+
+from .marine_api import MarineApiServer, synthetic_location
+from .reference import optimal_wave, split_forecast
+
+def measure(func, repeat):
+    """Time a callable and measure its peak allocations.
+
+    Args:
+        func (callable): The callable to measure.
+        repeat (int): The number of timed runs.
+
+    Returns:
+        dict: The median and 95th percentile in ms and the peak allocation in KiB.
+
+    """
+
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize(timings, peak)
+
+async def async_measure(func, repeat):
+    """Time an async callable and measure its peak allocations."""
+    await func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    await func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize(timings, peak)
+
+def summarize(timings, peak):
+    """Summarize run timings in ms and a peak allocation in bytes."""
+    timings = sorted(timings)
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "peak_kib": round(peak / 1024, 1)
+    }
+
+def bench_pipeline(days, resolution, repeat, recorded=None):
+    """Benchmark parsing and scoring a single location's forecast."""
+    payload = recorded or synthetic_location(-35.16, 138.47, days, resolution)
+    hourly = payload["hourly"]
+    metric = payload["hourly_units"]["wave_height"]
+    heights = hourly["wave_height"] + hourly["swell_wave_height"]
+    days_forecast = split_forecast(payload)
+
+    def parse():
+        # What an update does: validate, parse, then build every day sensor's attributes
+        forecast = ParsedForecast(MarineForecast(payload), days)
+        return [forecast.get_summary(date_key) for date_key in forecast.date_keys]
+
+    results = {
+        "parsed_forecast": measure(parse, repeat),
+        "split_forecast": measure(lambda: split_forecast(payload), repeat),
+        "optimal_wave": measure(
+            lambda: [optimal_wave(forecast, payload) for forecast in days_forecast.values()], repeat
+        ),
+        "get_wave_score": measure(lambda: [get_wave_score(height, metric) for height in heights], repeat),
+        "get_wave_scores": measure(lambda: get_wave_scores(heights, metric), repeat),
+    }
+    slots = len(hourly["time"])
+    for result in results.values():
+        result["slots_per_s"] = round(slots / (result["median_ms"] / 1000)) if result["median_ms"] else None
+    return results
+
+async def async_bench_update(server, days, resolution, locations, repeat):
+    """Benchmark full coordinator refreshes of many locations in one batch."""
+    from pytest_homeassistant_custom_component.common import async_test_home_assistant  # type: ignore
+
+    from custom_components.swell_forecast.api import get_scheduler
+    from custom_components.swell_forecast.coordinator import SwellForecastCoordinator
+    from custom_components.swell_forecast.sensor import CurrentDaySensor, DayForecastSensor
+
+    async with async_test_home_assistant() as hass:
+        scheduler = get_scheduler(hass)
+        scheduler.url = server.url
+        scheduler.batch_delay = 0
+
+        coordinators = []
+        for index in range(locations):
+            config = {
+                "location_name": f"Beach {index}",
+                "location_latitude": str(round(-38 + index * 0.01, 4)),
+                "location_longitude": str(round(138 + index * 0.01, 4)),
+                "measurement": "Metres"
+            }
+            options = {"forecast_days": days, "resolution": resolution}
+            coordinator = SwellForecastCoordinator(hass, config, options)
+            coordinator.add_sensors(
+                [CurrentDaySensor(config, coordinator)]
+                + [DayForecastSensor(config, coordinator, day) for day in range(1, days + 1)]
+            )
+            coordinators.append(coordinator)
+
+        async def refresh():
+            await asyncio.gather(*(coordinator.async_refresh(force=True) for coordinator in coordinators))
+
+        server.reset()
+        result = await async_measure(refresh, repeat)
+        runs = repeat + 2
+        result["locations_per_s"] = round(locations / (result["median_ms"] / 1000)) if result["median_ms"] else None
+        result["requests_per_refresh"] = round(server.requests / runs, 2)
+        result["kib_per_refresh"] = round(server.bytes_sent / runs / 1024, 1)
+        return result
+
+def print_table(title, rows):
+    """Print benchmark results as an aligned table."""
+    print(title)
+    if not rows:
+        return
+    columns = list(rows[0].keys())
+    widths = [max(len(column), *(len(str(row[column])) for row in rows)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[column]).ljust(width) for column, width in zip(columns, widths)))
+    print()
+
+async def async_main(args):
+    """Run the benchmarks."""
+    recorded = None
+    if args.payload:
+        with open(args.payload, encoding="utf-8") as file:
+            recorded = json.load(file)
+
+    report = {"pipeline": [], "update": []}
+    for days in args.days:
+        for resolution in args.resolution:
+            for name, result in bench_pipeline(days, resolution, args.repeat, recorded).items():
+                report["pipeline"].append({"days": days, "resolution": resolution, "stage": name, **result})
+    print_table("Forecast pipeline (single location)", report["pipeline"])
+
+    if not args.skip_update:
+        for days in args.days:
+            for resolution in args.resolution:
+                async with MarineApiServer(days, resolution, recorded) as server:
+                    for locations in args.locations:
+                        result = await async_bench_update(server, days, resolution, locations, args.repeat)
+                        report["update"].append({
+                            "days": days, "resolution": resolution, "locations": locations, **result
+                        })
+        print_table("Coordinator refresh (batched, local API)", report["update"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+def main():
+    """Parse the command line and run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, nargs="+", default=[5, 16])
+    parser.add_argument("--resolution", nargs="+", default=["hourly_3", "hourly_1"])
+    parser.add_argument("--locations", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--payload", help="A recorded single-location marine API response to serve")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--skip-update", action="store_true", help="Only run the pipeline benchmark")
+    asyncio.run(async_main(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
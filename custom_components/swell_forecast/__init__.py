@@ -1,34 +1,167 @@
-import logging  # noqa: D104
+import asyncio  # noqa: D104
+import logging
+import time
+
+import voluptuous as vol  # type: ignore[attr-defined]
 
 from homeassistant.config_entries import ConfigEntry # type: ignore
 from homeassistant.const import Platform # type: ignore
-from homeassistant.core import HomeAssistant # type: ignore
-from homeassistant.exceptions import ConfigEntryNotReady # type: ignore
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse # type: ignore
+from homeassistant.exceptions import ServiceValidationError # type: ignore
 
-from .const import DOMAIN
-from .utils import check_location
+from .api import get_scheduler
+from .const import (
+    DOMAIN,
+    RANKING_SIZE,
+    SERVICE_GET_BEST_SESSIONS,
+    SERVICE_GET_FORECAST,
+    SERVICE_GET_HISTORY,
+    SERVICE_REFRESH,
+)
+from .coordinator import SwellForecastCoordinator
+from .history import LocationHistory
+from .ranking import get_ranking
+from .utils import clean_string, valid_coordinates
 
 _LOGGER = logging.getLogger(__name__)
 
+PLATFORMS = [Platform.SENSOR, Platform.SWITCH]
+
+REFRESH_SCHEMA = vol.Schema({
+    vol.Optional("entry_id"): vol.Any(str, [str]),
+})
+
+GET_FORECAST_SCHEMA = vol.Schema({
+    vol.Required("entry_id"): str,
+    vol.Optional("day"): vol.All(vol.Coerce(int), vol.Range(min=1)),
+})
+
+GET_HISTORY_SCHEMA = vol.Schema({
+    vol.Required("entry_id"): str,
+    vol.Optional("hours", default=7 * 24): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    vol.Optional("lead_hours", default=24): vol.All(vol.Coerce(int), vol.Range(min=0)),
+})
+
+GET_BEST_SESSIONS_SCHEMA = vol.Schema({
+    vol.Optional("limit", default=RANKING_SIZE): vol.All(vol.Coerce(int), vol.Range(min=1, max=RANKING_SIZE)),
+})
+
 async def async_setup(hass, config):
     """Set up the integration."""
+
+    async def async_handle_refresh(call: ServiceCall):
+        """Refresh the forecast of the given entries, or of every entry."""
+        entry_ids = call.data.get("entry_id")
+        if isinstance(entry_ids, str):
+            entry_ids = [entry_ids]
+        coordinators = [
+            coordinator for entry_id, coordinator in hass.data.get(DOMAIN, {}).items()
+            if isinstance(coordinator, SwellForecastCoordinator) and (entry_ids is None or entry_id in entry_ids)
+        ]
+        await asyncio.gather(*(coordinator.async_refresh(force=True) for coordinator in coordinators))
+
+    async def async_handle_get_forecast(call: ServiceCall):
+        """Return the full hourly series of an entry."""
+        coordinator = hass.data.get(DOMAIN, {}).get(call.data["entry_id"])
+        if not isinstance(coordinator, SwellForecastCoordinator):
+            raise ServiceValidationError(f"Unknown swell forecast entry: {call.data['entry_id']}")
+        sensor_day = call.data.get("day")
+        if sensor_day is not None and coordinator.forecast is not None and sensor_day > len(coordinator.forecast.dates):
+            raise ServiceValidationError(f"Forecast day out of range: {sensor_day}")
+        forecast = coordinator.get_forecast(sensor_day)
+        if forecast is None:
+            raise ServiceValidationError("The forecast has not been fetched yet")
+        return forecast
+
+    async def async_handle_get_history(call: ServiceCall):
+        """Return the recent readings, forecast skill and best upcoming session of an entry."""
+        coordinator = hass.data.get(DOMAIN, {}).get(call.data["entry_id"])
+        if not isinstance(coordinator, SwellForecastCoordinator):
+            raise ServiceValidationError(f"Unknown swell forecast entry: {call.data['entry_id']}")
+        history = coordinator.history
+        now = time.time()
+        return {
+            "location_name": coordinator.config["location_name"],
+            "observed": history.get_observed(now - call.data["hours"] * 3600, now),
+            "skill": history.get_skill(call.data["lead_hours"]),
+            "best_session": history.get_best_session(now, now + 7 * 24 * 3600)
+        }
+
+    async def async_handle_get_best_sessions(call: ServiceCall):
+        """Return the best windows across every location, best first."""
+        return {"sessions": get_ranking(hass).get_top(call.data["limit"])}
+
+    hass.services.async_register(DOMAIN, SERVICE_REFRESH, async_handle_refresh, schema=REFRESH_SCHEMA)
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_FORECAST,
+        async_handle_get_forecast,
+        schema=GET_FORECAST_SCHEMA,
+        supports_response=SupportsResponse.ONLY
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_HISTORY,
+        async_handle_get_history,
+        schema=GET_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_BEST_SESSIONS,
+        async_handle_get_best_sessions,
+        schema=GET_BEST_SESSIONS_SCHEMA,
+        supports_response=SupportsResponse.ONLY
+    )
     return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up the integration from a config entry."""
     _LOGGER.info("Setting up custom integration from config entry: %s", entry.data['location_name'])
+    start = time.perf_counter()
 
-    location_check = await check_location(entry.data['location_latitude'], entry.data['location_longitude'])
-    if location_check is False:
-        raise ConfigEntryNotReady(f"Invalid location: {entry.data['location_latitude']} / {entry.data['location_longitude']}")
+    # The location was probed with the API in the config flow, so only check
+    # it locally here and leave fetching to the background refresh
+    if not valid_coordinates(entry.data['location_latitude'], entry.data['location_longitude']):
+        _LOGGER.error("Invalid location: %s / %s", entry.data['location_latitude'], entry.data['location_longitude'])
+        return False
 
+    scheduler = get_scheduler(hass)
+    coordinator = SwellForecastCoordinator(hass, entry.data, entry.options)
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = entry
+    hass.data[DOMAIN][entry.entry_id] = coordinator
+    entry.async_on_unload(scheduler.register(coordinator))
+    entry.async_on_unload(lambda: get_ranking(hass).remove(coordinator))
+    entry.async_on_unload(coordinator.shutdown)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
-    # Load sensors
-    await hass.config_entries.async_forward_entry_setups(entry, [Platform.SENSOR])
+    # Load sensors and the debug switch
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    # The stored forecast and history are loaded with the first refresh, so
+    # setup only waits for the sensors, which restore their last state
+    entry.async_create_background_task(hass, coordinator.async_start(), f"{DOMAIN} start {entry.entry_id}")
+    coordinator.metrics.record_stage("setup", time.perf_counter() - start)
     return True
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Reload a config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass, config_entry):
     """Unload a config entry."""
-    return await hass.config_entries.async_forward_entry_unload(config_entry, "sensor")
+    unloaded = await hass.config_entries.async_unload_platforms(config_entry, PLATFORMS)
+    if unloaded:
+        hass.data[DOMAIN].pop(config_entry.entry_id, None)
+    return unloaded
+
+async def async_remove_entry(hass, config_entry):
+    """Delete the history of a removed config entry, unless another entry has the same location name."""
+    key = clean_string(config_entry.data["location_name"])
+    if any(
+        clean_string(entry.data["location_name"]) == key
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.entry_id != config_entry.entry_id
+    ):
+        return
+    await LocationHistory(hass, key).async_remove()
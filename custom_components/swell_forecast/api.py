@@ -0,0 +1,541 @@
+"""Shared Open-Meteo marine API access for the Swell Forecast integration."""
+
+from array import array
+import asyncio
+import json
+import logging
+import time
+
+import aiohttp  # type: ignore  # noqa: PGH003
+from yarl import URL  # type: ignore
+
+from homeassistant.core import HomeAssistant  # type: ignore
+from homeassistant.helpers.aiohttp_client import async_get_clientsession  # type: ignore
+from homeassistant.helpers.event import async_track_point_in_utc_time  # type: ignore
+from homeassistant.util import dt as dt_util  # type: ignore
+from homeassistant.util.json import json_loads  # type: ignore
+
+from .cache import ForecastCache, get_expiry
+from .const import (
+    BATCH_DELAY,
+    CONF_FORECAST_DAYS,
+    CONF_HOURLY_VARIABLES,
+    CONF_RESOLUTION,
+    CONNECT_TIMEOUT,
+    CURRENT_VARIABLES,
+    DATA_SCHEDULER,
+    DEFAULT_FORECAST_DAYS,
+    DEFAULT_RESOLUTION,
+    DOMAIN,
+    EXTRA_HOURLY_VARIABLES,
+    HOURLY_VARIABLES,
+    MARINE_API_URL,
+    MAX_ATTEMPTS,
+    MAX_CONNECTIONS_PER_HOST,
+    OFFLOAD_MIN_SLOTS,
+    REQUEST_DEADLINE,
+    REQUEST_TIMEOUT,
+    RETRY_MAX_DELAY,
+    STREAM_CHUNK_SIZE,
+    STREAM_DECODE_THRESHOLD,
+)
+from .metrics import Metrics
+from .polling import next_poll_time
+from .resilience import CircuitBreaker, backoff_delay, parse_retry_after
+from .stream import MarineStreamDecoder, compact_location
+
+_LOGGER = logging.getLogger(__name__)
+
+TIMEOUT = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+def build_params(config, time_zone, options=None):
+    """Build the marine API query parameters for a config entry.
+
+    Only the variables the sensors use are requested, so the payload size
+    follows the configured horizon, resolution and extra variables.
+
+    Args:
+        config (dict): The config entry data.
+        time_zone (str): The Home Assistant time zone, or None.
+        options (dict): The config entry options.
+
+    Returns:
+        dict: The query parameters for the location.
+
+    """
+
+    options = options or {}
+    measurement = "imperial"
+    if config.get("measurement") == "Metres":
+        measurement = "metric"
+
+    hourly = list(HOURLY_VARIABLES)
+    for variable in EXTRA_HOURLY_VARIABLES:
+        if variable in options.get(CONF_HOURLY_VARIABLES, []):
+            hourly.append(variable)
+
+    return {
+        "latitude": config["location_latitude"],
+        "longitude": config["location_longitude"],
+        "current": list(CURRENT_VARIABLES),
+        "hourly": hourly,
+        "length_unit": measurement,
+        "timezone": time_zone or "auto",
+        "forecast_days": options.get(CONF_FORECAST_DAYS, DEFAULT_FORECAST_DAYS),
+        "temporal_resolution": options.get(CONF_RESOLUTION, DEFAULT_RESOLUTION),
+        "models": "best_match"
+    }
+
+def is_retryable(status):
+    """Return True if a failed request may succeed when retried.
+
+    Args:
+        status (int): The HTTP status, or None if no response was received.
+
+    """
+
+    return status is None or status == 429 or status >= 500
+
+def hourly_fingerprint(hourly):
+    """Get a hashable digest of the hourly columns of a location.
+
+    Args:
+        hourly (dict): The hourly block of a response, with lists or array('d') columns.
+
+    Returns:
+        tuple: The columns by name, as bytes or JSON.
+
+    """
+
+    if not isinstance(hourly, dict):
+        return None
+    return tuple(
+        (key, values.tobytes() if isinstance(values, array) else json.dumps(values))
+        for key, values in sorted(hourly.items())
+    )
+
+def group_key(params):
+    """Get the key of the batch a request can share.
+
+    Args:
+        params (dict): The query parameters for a single location.
+
+    Returns:
+        tuple: Every parameter except the coordinates, in a hashable form.
+
+    """
+
+    return tuple(sorted(
+        (key, tuple(value) if isinstance(value, list) else value)
+        for key, value in params.items()
+        if key not in ("latitude", "longitude")
+    ))
+
+def get_scheduler(hass: HomeAssistant):
+    """Get the shared fetch scheduler, creating it on first use."""
+
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_SCHEDULER not in domain_data:
+        domain_data[DATA_SCHEDULER] = MarineFetchScheduler(hass)
+    return domain_data[DATA_SCHEDULER]
+
+class MarineFetchScheduler:
+    """Batch marine API requests from every config entry into one call per cycle."""
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the scheduler."""
+        self.hass = hass
+        self.url = MARINE_API_URL
+        self.batch_delay = BATCH_DELAY
+        self.offload_threshold = OFFLOAD_MIN_SLOTS
+        self._session = async_get_clientsession(hass)
+        self.cache = ForecastCache(hass)
+        self.metrics = Metrics()
+        self._connections = asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+        self._coordinators = []
+        self._pending = {}
+        self._flush_handles = {}
+        self._breakers = {}
+        self._parsed = {}
+        self._unsub_timer = None
+        self._fingerprints = {}
+        self._last_known_good_keys = set()
+        self._changed = None
+        self._unchanged_polls = 0
+        self._current_interval = None
+
+    def register(self, coordinator):
+        """Register a coordinator to be refreshed every cycle.
+
+        Returns:
+            callable: A callback that unregisters the coordinator.
+
+        """
+
+        self._coordinators.append(coordinator)
+        if self._unsub_timer is None:
+            self._schedule_next()
+
+        def unregister():
+            if coordinator in self._coordinators:
+                self._coordinators.remove(coordinator)
+            # Forget the location unless another entry is in the same grid cell
+            key = self.cache.key(coordinator.params)
+            if all(self.cache.key(other.params) != key for other in self._coordinators):
+                self._fingerprints.pop(key, None)
+                self._parsed.pop(key, None)
+                self._last_known_good_keys.discard(key)
+            if not self._coordinators and self._unsub_timer is not None:
+                self._unsub_timer()
+                self._unsub_timer = None
+
+        return unregister
+
+    def _schedule_next(self):
+        """Schedule the next refresh from the model run times and recent changes."""
+        poll_time = next_poll_time(dt_util.utcnow(), self._unchanged_polls, self._current_interval)
+        _LOGGER.debug("Swell forecast - Next refresh at %s", poll_time)
+        self._unsub_timer = async_track_point_in_utc_time(self.hass, self._async_timer_fired, poll_time)
+
+    async def _async_timer_fired(self, now):
+        """Refresh every coordinator, then schedule the next refresh."""
+        self._unsub_timer = None
+        try:
+            await self.async_refresh()
+        finally:
+            if self._coordinators and self._unsub_timer is None:
+                self._schedule_next()
+
+    async def async_refresh(self, now=None):
+        """Refresh every registered coordinator; their fetches land in one batch."""
+        self._changed = None
+        await asyncio.gather(*(coordinator.async_refresh() for coordinator in list(self._coordinators)))
+        if self._changed is True:
+            self._unchanged_polls = 0
+        elif self._changed is False:
+            self._unchanged_polls += 1
+
+    def get_parsed(self, params, data):
+        """Get the forecast already parsed from this response, in a batch or for the same grid cell.
+
+        Returns:
+            ParsedForecast: The shared forecast, or None if it was not parsed yet.
+
+        """
+
+        parsed = self._parsed.get(self.cache.key(params))
+        if parsed is None or parsed[0] is not data:
+            return None
+        self.metrics.increment("shared_parses")
+        return parsed[1]
+
+    def is_last_known_good(self, params):
+        """Return True if the last response of a location was served from the cache because the API failed."""
+        return self.cache.key(params) in self._last_known_good_keys
+
+    def set_parsed(self, params, data, forecast):
+        """Share the forecast parsed from a response with the rest of its grid cell."""
+        self._parsed[self.cache.key(params)] = (data, forecast)
+
+    async def async_fetch(self, params, use_cache=True):
+        """Queue a single location request and wait for its share of the batch.
+
+        Responses still current in the cache are returned without a request.
+        Locations are requested by their model grid cell once it is known,
+        so locations in the same cell share one entry of the batch.
+
+        Args:
+            params (dict): The query parameters for a single location.
+            use_cache (bool): Return a current cached response if there is one.
+
+        Returns:
+            dict: The marine API response for the location, or None on failure.
+
+        """
+
+        params = self.cache.grid.snap(params)
+        cached = self.cache.get_current(params) if use_cache else None
+        if cached is not None:
+            _LOGGER.debug("Swell forecast - Using cached data: %s / %s", params["latitude"], params["longitude"])
+            self.metrics.increment("cache_hits")
+            self._last_known_good_keys.discard(self.cache.key(params))
+            return cached
+
+        key = group_key(params)
+        future = self.hass.loop.create_future()
+        self._pending.setdefault(key, []).append((params, future))
+        if key not in self._flush_handles:
+            self._flush_handles[key] = self.hass.loop.call_later(
+                self.batch_delay, lambda: self.hass.async_create_task(self._async_flush(key))
+            )
+        return await future
+
+    async def _async_flush(self, key):
+        """Send a queued batch and hand each location its response."""
+        batch = self._pending.pop(key, [])
+        self._flush_handles.pop(key, None)
+        if not batch:
+            return
+
+        coordinates = []
+        for params, _ in batch:
+            coordinate = (str(params["latitude"]), str(params["longitude"]))
+            if coordinate in coordinates:
+                self.metrics.increment("shared_locations")
+            else:
+                coordinates.append(coordinate)
+
+        try:
+            results = await self._async_request(batch[0][0], coordinates)
+        except Exception as e:  # noqa: BLE001
+            _LOGGER.error("Error fetching from API: %s", e)
+            results = [None] * len(coordinates)
+
+        try:
+            await self._async_offload_parse(batch, coordinates, results)
+        except Exception as e:  # noqa: BLE001
+            # The coordinators parse their responses inline instead
+            _LOGGER.error("Error parsing the batch in the executor: %s", e)
+        finally:
+            for params, future in batch:
+                if not future.done():
+                    coordinate = (str(params["latitude"]), str(params["longitude"]))
+                    future.set_result(results[coordinates.index(coordinate)])
+
+    async def _async_offload_parse(self, batch, coordinates, results):
+        """Parse a large batch in an executor thread rather than on the event loop.
+
+        Batches with fewer than offload_threshold hourly slots in total are
+        left to each coordinator to parse inline.
+        """
+
+        if self.offload_threshold is None:
+            return
+        responses = {}
+        for params, _ in batch:
+            data = results[coordinates.index((str(params["latitude"]), str(params["longitude"])))]
+            key = self.cache.key(params)
+            previous = self._parsed.get(key)
+            if data is None or key in responses or (previous is not None and previous[0] is data):
+                continue
+            responses[key] = (params, data, previous[1] if previous is not None else None)
+        slots = sum(len(data.get("hourly", {}).get("time", [])) for _, data, _ in responses.values())
+        if not responses or slots < self.offload_threshold:
+            return
+
+        from .forecast import parse_forecasts  # noqa: PLC0415
+
+        jobs = [(data, int(params["forecast_days"]), previous) for params, data, previous in responses.values()]
+        start = time.perf_counter()
+        forecasts = await self.hass.async_add_executor_job(parse_forecasts, jobs)
+        self.metrics.record_stage("parse_batch", time.perf_counter() - start)
+        for (params, data, _), forecast in zip(responses.values(), forecasts):
+            if forecast is not None:
+                self.set_parsed(params, data, forecast)
+                self.metrics.increment("offloaded_parses")
+
+    async def _async_request(self, params, coordinates):
+        """Request several locations at once, falling back to one at a time.
+
+        Open-Meteo rejects the whole request if a single coordinate is invalid,
+        so a batch rejected with a client error is retried per location to
+        isolate the bad entry. While the API is failing, or its circuit
+        breaker is open, the last known good response of each location is
+        returned instead.
+        """
+
+        batch_params = dict(params)
+        batch_params["latitude"] = ",".join(lat for lat, _ in coordinates)
+        batch_params["longitude"] = ",".join(lon for _, lon in coordinates)
+        locations = [dict(params, latitude=lat, longitude=lon) for lat, lon in coordinates]
+        metrics = self.metrics
+
+        breaker = self._breakers.setdefault(URL(self.url).host, CircuitBreaker())
+        if not breaker.allow_request():
+            _LOGGER.debug("Swell forecast - API circuit breaker is open, using last known data")
+            metrics.increment("breaker_rejections")
+            return self._last_known_good(locations)
+
+        status = None
+        retry_after = None
+        try:
+            async with asyncio.timeout(REQUEST_DEADLINE):
+                for attempt in range(1, MAX_ATTEMPTS + 1):
+                    status, results, retry_after = await self._async_send(batch_params, locations)
+                    if results is not None or not is_retryable(status):
+                        break
+                    if retry_after is not None and retry_after > RETRY_MAX_DELAY:
+                        # Wait with the circuit breaker rather than inside this request
+                        break
+                    if attempt < MAX_ATTEMPTS:
+                        metrics.increment("retries")
+                        await asyncio.sleep(backoff_delay(attempt, retry_after))
+        except TimeoutError:
+            _LOGGER.error("Error fetching from API: no response within %s seconds", REQUEST_DEADLINE)
+            metrics.increment("deadline_exceeded")
+            results = None
+
+        if results is not None:
+            breaker.record_success()
+            return results
+        if status is not None and not is_retryable(status):
+            # The API is up but refused the request
+            breaker.record_success()
+            if len(coordinates) == 1:
+                return [None]
+            metrics.increment("batch_splits")
+            results = []
+            for coordinate in coordinates:
+                results.extend(await self._async_request(params, [coordinate]))
+            return results
+
+        breaker.record_failure(retry_after)
+        if breaker.state == "open":
+            _LOGGER.warning(
+                "Swell forecast - Marine API is failing, pausing requests for %s seconds",
+                round(breaker.opened_until - time.monotonic())
+            )
+        return self._last_known_good(locations)
+
+    async def _async_send(self, batch_params, locations):
+        """Send a single batch request.
+
+        Returns:
+            tuple: The HTTP status (None if no response was received), the
+            response of each location (None on failure) and the Retry-After
+            delay in seconds, if the server sent one.
+
+        """
+
+        batch_key = self.cache.batch_key(locations)
+        headers = {
+            "Content-Type": "application/json",
+        }
+        cached = [self.cache.get(location) for location in locations]
+        if None not in cached:
+            headers.update(self.cache.get_validators(batch_key))
+
+        metrics = self.metrics
+        try:
+            async with self._connections:
+                _LOGGER.debug("Swell forecast fetching %s location(s)", len(locations))
+                metrics.increment("requests")
+                metrics.increment("locations_requested", len(locations))
+                start = time.perf_counter()
+                async with self._session.get(
+                    self.url, headers=headers, params=batch_params, timeout=TIMEOUT
+                ) as response:
+                    metrics.record_status(response.status)
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    expires = get_expiry(response.headers, time.time())
+                    if response.status == 304 and None not in cached:
+                        metrics.record_stage("request", time.perf_counter() - start)
+                        metrics.increment("not_modified")
+                        for location in locations:
+                            self.cache.refresh(location, expires)
+                            self._last_known_good_keys.discard(self.cache.key(location))
+                        self.cache.touch_validators(batch_key)
+                        self._track_changes(locations, None)
+                        return response.status, cached, None
+                    if response.status != 200:
+                        _LOGGER.debug("Swell forecast - Got data: %s", response.status)
+                        return response.status, None, retry_after
+
+                    if response.content_length is not None and response.content_length <= STREAM_DECODE_THRESHOLD:
+                        body = await response.read()
+                        metrics.record_stage("request", time.perf_counter() - start)
+                        metrics.increment("bytes_received", len(body))
+                        with metrics.timer("decode"):
+                            data = json_loads(body)
+                            data = [compact_location(location) for location in (data if isinstance(data, list) else [data])]
+                    else:
+                        data = await self._async_stream(response, start)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            _LOGGER.error("Error fetching from API: %s", e)
+            metrics.increment("errors")
+            return None, None, None
+        except ValueError as e:
+            _LOGGER.error("Error decoding the API response: %s", e)
+            metrics.increment("decode_errors")
+            return None, None, None
+
+        if isinstance(data, dict):
+            data = [data]
+        if not isinstance(data, list) or len(data) != len(locations):
+            _LOGGER.error("Swell forecast - Expected %s location(s) in the API response", len(locations))
+            metrics.increment("decode_errors")
+            return None, None, None
+        for location, location_data in zip(locations, data):
+            self.cache.set(location, location_data, expires)
+            self._last_known_good_keys.discard(self.cache.key(location))
+        # Storing the response may have taught the grid new cells, which the
+        # next request of these locations is keyed by
+        self.cache.set_validators(self.cache.batch_key(locations), response.headers)
+        self._track_changes(locations, data)
+        return response.status, data, None
+
+    async def _async_stream(self, response, start):
+        """Decode a large or chunked response as it arrives.
+
+        Returns:
+            list: The decoded response of each location.
+
+        Raises:
+            ValueError: The body is not valid JSON.
+
+        """
+
+        metrics = self.metrics
+        decoder = MarineStreamDecoder()
+        decoding = 0.0
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            metrics.increment("bytes_received", len(chunk))
+            chunk_start = time.perf_counter()
+            decoder.feed(chunk)
+            decoding += time.perf_counter() - chunk_start
+        chunk_start = time.perf_counter()
+        data = decoder.close()
+        decoding += time.perf_counter() - chunk_start
+        metrics.increment("streamed_responses")
+        metrics.record_stage("request", time.perf_counter() - start - decoding)
+        metrics.record_stage("decode", decoding)
+        return data
+
+    def _last_known_good(self, locations):
+        """Get the last stored response of each location, whatever its age."""
+        results = [self.cache.get(location) for location in locations]
+        self.metrics.increment("served_last_known_good", sum(result is not None for result in results))
+        self._last_known_good_keys.update(
+            self.cache.key(location) for location, result in zip(locations, results) if result is not None
+        )
+        return results
+
+    def _track_changes(self, locations, data):
+        """Record whether any location of a batch changed since it was last fetched.
+
+        Fingerprints are kept per location, so a new mix of locations in a
+        batch is only a change if one of the locations changed. The time of
+        the current readings is part of the fingerprint, so new readings reset
+        the poll backoff like a new forecast does.
+
+        Args:
+            locations (list): The query parameters of each location.
+            data (list): The batch response, or None when the API sent a 304.
+
+        """
+
+        changed = False
+        if data is not None:
+            for params, location in zip(locations, data):
+                key = self.cache.key(params)
+                current = location.get("current") or {}
+                fingerprint = hash((current.get("time"), hourly_fingerprint(location.get("hourly"))))
+                if self._fingerprints.get(key) != fingerprint:
+                    changed = True
+                self._fingerprints[key] = fingerprint
+                interval = current.get("interval")
+                if interval and location.get("current_units", {}).get("interval") == "minutes":
+                    interval *= 60
+                if interval and (self._current_interval is None or interval < self._current_interval):
+                    self._current_interval = interval
+        self._changed = bool(self._changed) or changed
@@ -0,0 +1,232 @@
+"""Persistent cache of marine API responses."""
+
+from array import array
+import asyncio
+from email.utils import parsedate_to_datetime
+import logging
+import re
+import time
+
+from homeassistant.core import HomeAssistant  # type: ignore
+from homeassistant.helpers.storage import Store  # type: ignore
+
+from .const import (
+    CACHE_DEFAULT_TTL,
+    CACHE_MAX_AGE,
+    CACHE_SAVE_DELAY,
+    CACHE_STORAGE_KEY,
+    CACHE_STORAGE_VERSION,
+)
+from .grid import GridIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_AGE = re.compile(r"max-age=(\d+)")
+
+def cache_key(params):
+    """Get the cache key of a request.
+
+    Args:
+        params (dict): The query parameters of the request.
+
+    Returns:
+        str: The parameters in a stable, query string like form.
+
+    """
+
+    return "&".join(
+        key + "=" + (",".join(str(item) for item in value) if isinstance(value, list) else str(value))
+        for key, value in sorted(params.items())
+    )
+
+def get_expiry(headers, now):
+    """Get when a response stops being current from its cache headers.
+
+    Args:
+        headers (Mapping): The response headers.
+        now (float): The time the response was received.
+
+    Returns:
+        float: The expiry as a timestamp.
+
+    """
+
+    match = MAX_AGE.search(headers.get("Cache-Control", ""))
+    if match:
+        return now + int(match.group(1))
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            return parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            _LOGGER.debug("Swell forecast - Invalid Expires header: %s", expires)
+    return now + CACHE_DEFAULT_TTL
+
+def _serializable(cached):
+    """Get a cached location with its array('d') columns as lists, for storage."""
+    hourly = cached["data"].get("hourly") if isinstance(cached["data"], dict) else None
+    if not isinstance(hourly, dict) or not any(isinstance(values, array) for values in hourly.values()):
+        return cached
+    hourly = {
+        key: [None if value != value else value for value in values] if isinstance(values, array) else values
+        for key, values in hourly.items()
+    }
+    return dict(cached, data=dict(cached["data"], hourly=hourly))
+
+class ForecastCache:
+    """Marine API responses stored in Home Assistant's .storage directory.
+
+    Each location is cached with the time it stops being current. Batched
+    requests also keep their ETag / Last-Modified validators so an expired
+    batch can be refreshed with a conditional request. Locations, and the
+    validators of batches, are keyed by their model grid cell once it is
+    known, so nearby locations share one entry.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the cache."""
+        self.hass = hass
+        self._store = Store(hass, CACHE_STORAGE_VERSION, CACHE_STORAGE_KEY)
+        self._locations = {}
+        self._validators = {}
+        self.grid = GridIndex()
+        self._load_task = None
+
+    async def async_load(self):
+        """Load the cache from storage, once.
+
+        Entries set up together all wait for the same load.
+        """
+
+        if self._load_task is None:
+            self._load_task = self.hass.async_create_task(self._async_load())
+        await asyncio.shield(self._load_task)
+
+    async def _async_load(self):
+        """Merge the stored cache under anything cached while it was loading."""
+        stored = await self._store.async_load()
+        if stored:
+            # Drop locations that are no longer configured or polled
+            oldest = time.time() - CACHE_MAX_AGE
+            locations = {
+                key: cached for key, cached in stored.get("locations", {}).items()
+                if cached["fetched"] > oldest
+            }
+            self._locations = {**locations, **self._locations}
+            validators = {
+                key: validators for key, validators in stored.get("validators", {}).items()
+                if validators.get("stored", 0) > oldest
+            }
+            self._validators = {**validators, **self._validators}
+            self.grid.cells = {**(stored.get("cells") or {}), **self.grid.cells}
+
+    def key(self, params):
+        """Get the cache key of a location, snapped to its grid cell."""
+        return cache_key(self.grid.snap(params))
+
+    def get(self, params):
+        """Get the cached response of a location, current or not."""
+        cached = self._locations.get(self.key(params))
+        if cached is None:
+            return None
+        return cached["data"]
+
+    def get_fetched(self, params):
+        """Get when the cached response of a location was fetched, as a timestamp."""
+        cached = self._locations.get(self.key(params))
+        if cached is None:
+            return None
+        return cached["fetched"]
+
+    def get_current(self, params):
+        """Get the cached response of a location while it is still current."""
+        cached = self._locations.get(self.key(params))
+        if cached is None or cached["expires"] <= time.time():
+            return None
+        return cached["data"]
+
+    def batch_key(self, locations):
+        """Get the validators key of a batch, from the grid cells of its locations.
+
+        Args:
+            locations (list): The query parameters of each location, in request order.
+
+        Returns:
+            str: The cache key of each location, joined.
+
+        """
+
+        return "|".join(self.key(location) for location in locations)
+
+    def get_validators(self, batch_key):
+        """Get the conditional request headers of a batch."""
+        validators = self._validators.get(batch_key, {})
+        headers = {}
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last_modified" in validators:
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def set(self, params, data, expires):
+        """Cache the response of a location, learning its grid cell."""
+        self.grid.learn(params, data)
+        self._locations[self.key(params)] = {
+            "data": data,
+            "fetched": time.time(),
+            "expires": expires
+        }
+        self._schedule_save()
+
+    def refresh(self, params, expires):
+        """Mark a cached response as current again after a 304."""
+        cached = self._locations.get(self.key(params))
+        if cached is not None:
+            cached["fetched"] = time.time()
+            cached["expires"] = expires
+            self._schedule_save()
+
+    def set_validators(self, batch_key, headers):
+        """Remember the validators a batch response was sent with."""
+        validators = {}
+        if headers.get("ETag"):
+            validators["etag"] = headers["ETag"]
+        if headers.get("Last-Modified"):
+            validators["last_modified"] = headers["Last-Modified"]
+        if validators:
+            validators["stored"] = time.time()
+            self._validators[batch_key] = validators
+        else:
+            self._validators.pop(batch_key, None)
+        self._prune_validators()
+        self._schedule_save()
+
+    def touch_validators(self, batch_key):
+        """Keep the validators of a batch that was just answered with a 304."""
+        validators = self._validators.get(batch_key)
+        if validators is not None:
+            validators["stored"] = time.time()
+            self._schedule_save()
+
+    def _prune_validators(self):
+        """Drop the validators of batches not requested within CACHE_MAX_AGE.
+
+        Batches are keyed by the grid cells of their locations, so each new
+        mix of locations adds an entry.
+        """
+
+        oldest = time.time() - CACHE_MAX_AGE
+        for batch_key in [key for key, validators in self._validators.items() if validators.get("stored", 0) <= oldest]:
+            del self._validators[batch_key]
+
+    def _schedule_save(self):
+        """Write the cache to storage, batching changes made close together."""
+        self._store.async_delay_save(self._data_to_save, CACHE_SAVE_DELAY)
+
+    def _data_to_save(self):
+        """Get the data to write to storage."""
+        return {
+            "locations": {key: _serializable(cached) for key, cached in self._locations.items()},
+            "validators": self._validators,
+            "cells": self.grid.cells
+        }
@@ -0,0 +1,262 @@
+"""Columnar processing of the marine API hourly arrays.
+
+NumPy is used when it is installed (it ships with Home Assistant); otherwise
+the same results are computed in pure Python.
+"""
+
+from array import array
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover
+    np = None
+
+from .scoring import get_wave_scores
+from .timestamps import get_time_axis
+
+class ForecastColumns:
+    """Hourly forecast columns grouped by day."""
+
+    __slots__ = (
+        "bounds",
+        "date_keys",
+        "extra",
+        "labels",
+        "swell_heights",
+        "swell_peaks",
+        "wave_heights",
+        "wave_peaks",
+    )
+
+    def __init__(self, date_keys, bounds, labels, wave_heights, swell_heights, wave_peaks, swell_peaks, extra=None):
+        """Initialize the columns.
+
+        Args:
+            date_keys (Sequence): The 'YYYYMMDD' key of each day, in order.
+            bounds (Sequence): The (start, end) slot range of each day.
+            labels (Sequence): The display time of each slot, such as "3pm",
+                shared with every location on the same time axis.
+            wave_heights (list): The rounded wave height of each slot.
+            swell_heights (list): The rounded swell height of each slot.
+            wave_peaks (list): The slot of each day's highest wave, or None.
+            swell_peaks (list): The slot of each day's highest swell, or None.
+            extra (dict): The rounded values of each extra hourly variable.
+
+        """
+
+        self.date_keys = date_keys
+        self.bounds = bounds
+        self.labels = labels
+        self.wave_heights = wave_heights
+        self.swell_heights = swell_heights
+        self.wave_peaks = wave_peaks
+        self.swell_peaks = swell_peaks
+        self.extra = extra or {}
+
+    def split(self, date_keys=None):
+        """Split the slots into per-day forecast lists.
+
+        Args:
+            date_keys (Collection): Only split these days, or every day if None.
+
+        Returns:
+            dict: The forecast slots of each day, keyed by date key.
+
+        """
+
+        labels = self.labels
+        wave_heights = self.wave_heights
+        swell_heights = self.swell_heights
+        days = {
+            date_key: [{
+                "time": labels[index],
+                "wave_height": wave_heights[index],
+                "swell_height": swell_heights[index]
+            } for index in range(start, end)]
+            for date_key, (start, end) in zip(self.date_keys, self.bounds)
+            if date_keys is None or date_key in date_keys
+        }
+        if self.extra:
+            for date_key, (start, end) in zip(self.date_keys, self.bounds):
+                if date_key in days:
+                    for index, slot in zip(range(start, end), days[date_key]):
+                        for variable, values in self.extra.items():
+                            slot[variable] = values[index]
+        return days
+
+    def changed_days(self, previous):
+        """Get the days whose slots differ from an earlier load.
+
+        Args:
+            previous (ForecastColumns): The columns of the previous response.
+
+        Returns:
+            frozenset: The date keys that are new or have any changed slot.
+
+        """
+
+        previous_bounds = dict(zip(previous.date_keys, previous.bounds))
+        changed = set()
+        for date_key, (start, end) in zip(self.date_keys, self.bounds):
+            bounds = previous_bounds.get(date_key)
+            if bounds is None or end - start != bounds[1] - bounds[0]:
+                changed.add(date_key)
+                continue
+            old_start, old_end = bounds
+            if (
+                self.wave_heights[start:end] != previous.wave_heights[old_start:old_end]
+                or self.swell_heights[start:end] != previous.swell_heights[old_start:old_end]
+                or self.labels[start:end] != previous.labels[old_start:old_end]
+                or self.extra.keys() != previous.extra.keys()
+                or any(
+                    values[start:end] != previous.extra[variable][old_start:old_end]
+                    for variable, values in self.extra.items()
+                )
+            ):
+                changed.add(date_key)
+        return frozenset(changed)
+
+    def optimal_waves(self, wave_height_metric, swell_height_metric, date_keys=None):
+        """Get the optimal wave of every day.
+
+        Args:
+            wave_height_metric (str): The unit of the wave heights.
+            swell_height_metric (str): The unit of the swell heights.
+            date_keys (Collection): Only describe these days, or every day if None.
+
+        Returns:
+            dict: The optimal wave of each day, keyed by date key, with the
+            height, time and score of the day's biggest wave and swell.
+
+        """
+
+        days = [
+            (date_key, wave_peak, swell_peak)
+            for date_key, wave_peak, swell_peak in zip(self.date_keys, self.wave_peaks, self.swell_peaks)
+            if date_keys is None or date_key in date_keys
+        ]
+        # Score every day's peaks in one call per series
+        wave_scores = get_wave_scores(
+            [0 if peak is None else self.wave_heights[peak] for _, peak, _ in days], wave_height_metric
+        )
+        swell_scores = get_wave_scores(
+            [0 if peak is None else self.swell_heights[peak] for _, _, peak in days], swell_height_metric
+        )
+        return {
+            date_key: {
+                "wave": self._peak(wave_peak, self.wave_heights, wave_height_metric, wave_score),
+                "swell": self._peak(swell_peak, self.swell_heights, swell_height_metric, swell_score)
+            }
+            for (date_key, wave_peak, swell_peak), wave_score, swell_score in zip(days, wave_scores, swell_scores)
+        }
+
+    def _peak(self, index, heights, metric, score):
+        """Describe the peak slot of a day."""
+        if index is None:
+            return {
+                "max_height": 0,
+                "max_time": 0,
+                "max": None,
+                "score": score
+            }
+        height = heights[index]
+        time = self.labels[index]
+        return {
+            "max_height": height,
+            "max_time": time,
+            "max": str(height) + metric + " @ " + time,
+            "score": score
+        }
+
+def load_columns(times, wave_heights, swell_heights, extra=None):
+    """Load the marine API hourly arrays into forecast columns.
+
+    Args:
+        times (list): The ISO 8601 time of each slot.
+        wave_heights (Sequence): The wave height of each slot, None or NaN if missing.
+        swell_heights (Sequence): The swell height of each slot, None or NaN if missing.
+        extra (dict): Other hourly variables to add to each slot, by name.
+
+    Returns:
+        ForecastColumns: The columns grouped by day.
+
+    """
+
+    if np is not None:
+        return _load_numpy(times, wave_heights, swell_heights, extra or {})
+    return _load_python(times, wave_heights, swell_heights, extra or {})
+
+def _as_float_array(values):
+    """Get a float array of a column, without copying array('d') columns."""
+    if isinstance(values, array):
+        return np.frombuffer(values, dtype=float)
+    return np.asarray(values, dtype=float)
+
+def _load_numpy(times, wave_heights, swell_heights, extra):
+    """Load the hourly arrays with vectorised NumPy operations."""
+    if not len(times):
+        return ForecastColumns([], [], [], [], [], [], [])
+    axis = get_time_axis(times)
+    starts = np.asarray(axis.starts)
+
+    # The API reports two decimals, so np.round matches round() on real payloads
+    wave = np.round(_as_float_array(wave_heights), 2)
+    swell = np.round(_as_float_array(swell_heights), 2)
+
+    return ForecastColumns(
+        axis.date_keys,
+        axis.bounds,
+        axis.labels,
+        _to_list(wave),
+        _to_list(swell),
+        _peaks(wave, starts),
+        _peaks(swell, starts),
+        {variable: _to_list(np.round(_as_float_array(values), 2)) for variable, values in extra.items()}
+    )
+
+def _to_list(values):
+    """Convert a float array to a list, with missing values as None."""
+    missing = np.isnan(values)
+    if not missing.any():
+        return values.tolist()
+    return np.where(missing, None, values).tolist()
+
+def _peaks(values, starts):
+    """Find the first slot holding each day's maximum, ignoring heights <= 0."""
+    filled = np.where(np.isnan(values), -np.inf, values)
+    maxes = np.maximum.reduceat(filled, starts)
+    counts = np.diff(np.append(starts, filled.size))
+    positions = np.flatnonzero(filled == np.repeat(maxes, counts))
+    first = positions[np.searchsorted(positions, starts)]
+    return [int(index) if peak > 0 else None for index, peak in zip(first.tolist(), maxes.tolist())]
+
+def _round(value):
+    """Round a height to two decimals, keeping missing values as None."""
+    if value is None or value != value:
+        return None
+    return round(value, 2)
+
+def _day_peak(heights, start, end):
+    """Find the first slot holding a day's maximum, ignoring heights <= 0."""
+    peak = None
+    for index in range(start, end):
+        height = heights[index]
+        if height is not None and height > (0 if peak is None else heights[peak]):
+            peak = index
+    return peak
+
+def _load_python(times, wave_values, swell_values, extra):
+    """Load the hourly arrays in pure Python."""
+    axis = get_time_axis(times)
+    wave_heights = [_round(value) for value in wave_values]
+    swell_heights = [_round(value) for value in swell_values]
+    return ForecastColumns(
+        axis.date_keys,
+        axis.bounds,
+        axis.labels,
+        wave_heights,
+        swell_heights,
+        [_day_peak(wave_heights, start, end) for start, end in axis.bounds],
+        [_day_peak(swell_heights, start, end) for start, end in axis.bounds],
+        {variable: [_round(value) for value in values] for variable, values in extra.items()}
+    )
@@ -3,8 +3,22 @@
 import voluptuous as vol  # type: ignore[attr-defined]
 
 from homeassistant import config_entries # type: ignore
+from homeassistant.core import callback # type: ignore
+from homeassistant.helpers import config_validation as cv # type: ignore
 
-from .const import DOMAIN
+from .const import (
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_FORECAST_DAYS,
+    CONF_HOURLY_VARIABLES,
+    CONF_RESOLUTION,
+    DEFAULT_FORECAST_DAYS,
+    DEFAULT_RESOLUTION,
+    DOMAIN,
+    EXTRA_HOURLY_VARIABLES,
+    MAX_FORECAST_DAYS,
+    RESOLUTIONS,
+)
+from .utils import check_location
 
 @config_entries.HANDLERS.register(DOMAIN)
 class BeachSwellForecastConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -13,10 +27,21 @@ class BeachSwellForecastConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
     CONNECTION_CLASS = config_entries.CONN_CLASS_CLOUD_POLL
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return BeachSwellForecastOptionsFlow()
+
     async def async_step_user(self, user_input=None):
         """Handle the initial step of the config flow."""
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title="Beach Swell Sensor", data=user_input)
+            # Probing here keeps entry setup free of network calls
+            error = await check_location(self.hass, user_input)
+            if error is None:
+                return self.async_create_entry(title="Beach Swell Sensor", data=user_input)
+            errors["base"] = error
 
         return self.async_show_form(
             step_id="user",
@@ -31,5 +56,33 @@ class BeachSwellForecastConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 "location_latitude": "Swell latitude - Can grab from Google Maps.",
                 "location_longitude": "Swell longitude - Can grab from Google Maps.",
                 "measurement": "Swell height - Metres or feet.",
-            }
+            },
+            errors=errors
+        )
+
+class BeachSwellForecastOptionsFlow(config_entries.OptionsFlow):
+    """Handle the options of a Beach Swell Forecast entry."""
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Required(
+                    CONF_FORECAST_DAYS, default=options.get(CONF_FORECAST_DAYS, DEFAULT_FORECAST_DAYS)
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_FORECAST_DAYS)),
+                vol.Required(
+                    CONF_RESOLUTION, default=options.get(CONF_RESOLUTION, DEFAULT_RESOLUTION)
+                ): vol.In(RESOLUTIONS),
+                vol.Required(
+                    CONF_HOURLY_VARIABLES, default=options.get(CONF_HOURLY_VARIABLES, [])
+                ): cv.multi_select(list(EXTRA_HOURLY_VARIABLES)),
+                vol.Required(
+                    CONF_COMPACT_ATTRIBUTES, default=options.get(CONF_COMPACT_ATTRIBUTES, False)
+                ): bool
+            })
         )
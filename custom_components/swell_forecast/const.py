@@ -1,3 +1,97 @@
 """Constants for the Beach Swell Forecast integration."""
 
+from datetime import timedelta
+
 DOMAIN = "swell_forecast"
+
+MARINE_API_URL = "https://marine-api.open-meteo.com/v1/marine"
+SCAN_INTERVAL = timedelta(hours=1)
+
+# The marine models run every 6 hours and their output is usually served a few hours later
+MODEL_RUN_HOURS = (0, 6, 12, 18)
+MODEL_OUTPUT_DELAY = timedelta(hours=4)
+MAX_POLL_INTERVAL = timedelta(hours=6)
+POLL_OFFSET = timedelta(minutes=1)
+POLL_JITTER = 120
+
+# Sensors become unavailable when the last successful update is older than this
+STALE_AFTER = timedelta(hours=12)
+
+# Requests queued within this many seconds are sent as one multi-location call
+BATCH_DELAY = 0.5
+
+# Outbound requests share Home Assistant's pooled session; these bound each call
+MAX_CONNECTIONS_PER_HOST = 4
+REQUEST_TIMEOUT = 30
+CONNECT_TIMEOUT = 10
+
+# Responses larger than this, or of unknown length, are decoded as they arrive
+STREAM_DECODE_THRESHOLD = 256 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Batches with at least this many hourly slots in total are parsed in an executor thread
+OFFLOAD_MIN_SLOTS = 2000
+
+# Failed requests are retried with exponential backoff, all within REQUEST_DEADLINE seconds
+MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 2
+RETRY_MAX_DELAY = 30
+REQUEST_DEADLINE = 120
+
+# Requests stop for BREAKER_RESET_TIMEOUT seconds after this many failed batches in a row
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_RESET_TIMEOUT = 5 * 60
+
+# Responses are kept in .storage; without cache headers they stay current for CACHE_DEFAULT_TTL seconds
+CACHE_STORAGE_KEY = DOMAIN + ".cache"
+CACHE_STORAGE_VERSION = 1
+CACHE_DEFAULT_TTL = 30 * 60
+CACHE_MAX_AGE = 7 * 24 * 60 * 60
+CACHE_SAVE_DELAY = 10
+
+# Forecast and observed heights kept per location, in memory and in an append-only file
+HISTORY_OBSERVED_CAPACITY = 4 * 24 * 30
+HISTORY_FORECAST_CAPACITY = 8192
+HISTORY_MIN_ROWS = 64
+HISTORY_MAX_AGE = 30 * 24 * 60 * 60
+HISTORY_COMPACT_FACTOR = 2
+
+# Parsed time axes and timestamps shared by every location, evicted least recently used first
+TIME_AXIS_CACHE_SIZE = 32
+TIMESTAMP_CACHE_SIZE = 1024
+
+# Configured coordinates are matched to model grid cells at this many decimals
+COORDINATE_PRECISION = 4
+
+DATA_SCHEDULER = "scheduler"
+DATA_RANKING = "ranking"
+
+# The number of best windows kept across every location
+RANKING_SIZE = 10
+
+SERVICE_REFRESH = "refresh"
+SERVICE_GET_FORECAST = "get_forecast"
+SERVICE_GET_HISTORY = "get_history"
+SERVICE_GET_BEST_SESSIONS = "get_best_sessions"
+
+# Options
+CONF_COMPACT_ATTRIBUTES = "compact_attributes"
+CONF_FORECAST_DAYS = "forecast_days"
+CONF_RESOLUTION = "resolution"
+CONF_HOURLY_VARIABLES = "hourly_variables"
+
+DEFAULT_FORECAST_DAYS = 5
+MAX_FORECAST_DAYS = 16
+DEFAULT_RESOLUTION = "hourly_3"
+RESOLUTIONS = ("hourly_1", "hourly_3", "hourly_6")
+
+# The sensors always use these; other hourly variables are only requested when enabled
+CURRENT_VARIABLES = ("wave_height", "swell_wave_height")
+HOURLY_VARIABLES = ("wave_height", "swell_wave_height")
+EXTRA_HOURLY_VARIABLES = (
+    "wave_direction",
+    "wave_period",
+    "swell_wave_direction",
+    "swell_wave_period",
+    "wind_wave_height",
+)
@@ -0,0 +1,323 @@
+"""Coordinator fetching the forecast of a config entry."""
+
+import asyncio
+import cProfile
+from datetime import datetime, timezone
+import importlib
+import io
+import logging
+import pstats
+import sys
+
+import voluptuous as vol  # type: ignore
+
+from homeassistant.core import HomeAssistant  # type: ignore
+from homeassistant.util import dt as dt_util  # type: ignore
+
+from .api import build_params, get_scheduler
+from .const import CONF_COMPACT_ATTRIBUTES, CONF_FORECAST_DAYS, DEFAULT_FORECAST_DAYS, STALE_AFTER
+from .history import LocationHistory
+from .metrics import Metrics
+from .ranking import get_ranking
+from .utils import clean_string
+
+_LOGGER = logging.getLogger(__name__)
+
+# Only one cProfile profiler can be active at a time
+PROFILE_LOCK = asyncio.Lock()
+
+# Parsing pulls in NumPy, the response schemas and the scoring tables, so it is
+# imported on the first update rather than while Home Assistant starts
+PROCESSING_MODULE = __package__ + ".forecast"
+
+async def async_load_processing(hass: HomeAssistant):
+    """Import the forecast processing modules, once, in the import executor."""
+    if PROCESSING_MODULE in sys.modules:
+        return
+    with get_scheduler(hass).metrics.timer("import"):
+        await hass.async_add_import_executor_job(importlib.import_module, PROCESSING_MODULE)
+
+class SwellForecastCoordinator:
+    """Fetch the forecast of a location and push it to its sensors.
+
+    Concurrent refreshes share one in-flight fetch, and the time of the last
+    successful update is tracked so sensors can report stale data.
+    """
+
+    def __init__(self, hass: HomeAssistant, config, options=None):
+        """Initialize the coordinator with the config entry data and options."""
+        self.hass = hass
+        self.config = config
+        self.options = options or {}
+        self.sensors = []
+        self.data = None
+        self.forecast = None
+        self.last_update_success = False
+        self.last_success = None
+        self.last_attempt = None
+        self.metrics = Metrics()
+        self.history = LocationHistory(hass, clean_string(config["location_name"]))
+        self.profile_next_update = False
+        self.last_profile = None
+        self._listeners = []
+        self._refresh_task = None
+
+    @property
+    def params(self):
+        """Return the marine API query parameters of the location."""
+        return build_params(self.config, self.hass.config.time_zone, self.options)
+
+    @property
+    def forecast_days(self):
+        """Return the number of forecast days, and of day sensors."""
+        return self.options.get(CONF_FORECAST_DAYS, DEFAULT_FORECAST_DAYS)
+
+    @property
+    def compact_attributes(self):
+        """Return True when sensors only expose summary attributes."""
+        return self.options.get(CONF_COMPACT_ATTRIBUTES, False)
+
+    @property
+    def is_stale(self):
+        """Return True when there is no data newer than STALE_AFTER."""
+        if self.last_success is None:
+            return True
+        return dt_util.utcnow() - self.last_success > STALE_AFTER
+
+    @property
+    def skipped_writes(self):
+        """Return the number of state writes skipped because nothing changed."""
+        return sum(sensor.skipped_writes for sensor in self.sensors)
+
+    async def async_start(self):
+        """Load the stored forecast and history of the entry, then refresh it.
+
+        Runs in the background once the entry is set up, while the sensors
+        show the state they had before Home Assistant restarted.
+        """
+
+        with self.metrics.timer("startup"):
+            await get_scheduler(self.hass).cache.async_load()
+            await async_load_processing(self.hass)
+            self.hydrate()
+            await self.history.async_load()
+        await self.async_refresh()
+
+    def hydrate(self):
+        """Load the last stored response, if any, before the first fetch."""
+        if self.forecast is not None:
+            return
+        cache = get_scheduler(self.hass).cache
+        data = cache.get(self.params)
+        if data is None:
+            return
+        try:
+            self._set_data(data)
+        except vol.Invalid as e:
+            _LOGGER.warning("Stored swell forecast is not valid: %s", e)
+            return
+        self.last_success = self._fetched_time()
+        self.update_sensors()
+        get_ranking(self.hass).update(self)
+
+    def add_listener(self, listener):
+        """Add a callback run after every update attempt.
+
+        Returns:
+            callable: A callback that removes the listener.
+
+        """
+
+        self._listeners.append(listener)
+
+        def remove():
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return remove
+
+    def add_sensors(self, sensors):
+        """Add the sensors to update, filling them with the current data."""
+        self.sensors.extend(sensors)
+        if self.forecast is not None:
+            for sensor in sensors:
+                sensor.update_state(self.forecast)
+
+    async def async_refresh(self, force=False):
+        """Refresh the data, joining a refresh that is already in flight.
+
+        Args:
+            force (bool): Skip the response cache and always call the API.
+
+        """
+
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = self.hass.async_create_task(self._async_update(force))
+        await asyncio.shield(self._refresh_task)
+
+    def shutdown(self):
+        """Cancel an update in flight when the entry unloads."""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+
+    async def _async_update(self, force):
+        """Fetch new data for the sensors and update their state."""
+        try:
+            if self.profile_next_update:
+                async with PROFILE_LOCK:
+                    await self._async_profile_update(force)
+            else:
+                with self.metrics.timer("update"):
+                    await self._async_fetch_and_update(force)
+        finally:
+            for listener in list(self._listeners):
+                listener()
+
+    async def _async_profile_update(self, force):
+        """Run an update under cProfile.
+
+        The profiler covers the whole event loop, so other entries updating
+        in the same cycle show up in the statistics too.
+        """
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Another profiler, such as Home Assistant's profiler integration, is running
+            _LOGGER.warning("Swell sensor update for %s could not be profiled: %s", self.config["location_name"], e)
+            self.profile_next_update = False
+            profiler = None
+        try:
+            with self.metrics.timer("update"):
+                await self._async_fetch_and_update(force)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._store_profile(profiler)
+
+    async def _async_fetch_and_update(self, force):
+        """Fetch the forecast, parse it and push it to the sensors."""
+        _LOGGER.debug("Swell sensor updating: %s", self.config["location_name"])
+        self.last_attempt = dt_util.utcnow()
+        self.metrics.increment("updates")
+
+        scheduler = get_scheduler(self.hass)
+        with self.metrics.timer("fetch"):
+            data = await scheduler.async_fetch(self.params, use_cache=not force)
+        if data is None:
+            _LOGGER.debug("Swell sensor - No data for: %s", self.config["location_name"])
+            self.metrics.increment("failures")
+            self.last_update_success = False
+            self._write_states()
+            return
+
+        await async_load_processing(self.hass)
+        previous = self.forecast
+        try:
+            with self.metrics.timer("parse"):
+                self._set_data(data)
+        except vol.Invalid as e:
+            _LOGGER.error("Swell forecast for %s is not valid: %s", self.config["location_name"], e)
+            self.metrics.increment("invalid_responses")
+            self.last_update_success = False
+            self._write_states()
+            return
+
+        # The last known good response keeps the sensors filled, but the API
+        # failed, so the update is still recorded as a failure
+        if scheduler.is_last_known_good(self.params):
+            _LOGGER.debug("Swell sensor - Using last known good data for: %s", self.config["location_name"])
+            self.metrics.increment("failures")
+            self.last_update_success = False
+        else:
+            self.last_update_success = True
+        self.last_success = self._fetched_time()
+        with self.metrics.timer("sensors"):
+            self.update_sensors()
+            get_ranking(self.hass).update(self)
+        if self.forecast is not previous:
+            with self.metrics.timer("history"):
+                await self.history.async_record(self.forecast, self.last_success.timestamp())
+
+    def _store_profile(self, profiler):
+        """Keep and log the statistics of a profiled update."""
+        self.profile_next_update = False
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(30)
+        self.last_profile = output.getvalue()
+        _LOGGER.info("Swell sensor update profile for %s:\n%s", self.config["location_name"], self.last_profile)
+
+    def get_forecast(self, sensor_day=None):
+        """Get the full hourly series, for one forecast day or all of them.
+
+        Args:
+            sensor_day (int): The forecast day, where day 1 is the current day.
+
+        Returns:
+            dict: The location, height metric, the unit of each extra hourly
+            variable and the forecast slots of each day keyed by date key, or
+            None before the first update.
+
+        """
+
+        if self.forecast is None:
+            return None
+        days = self.forecast.days
+        if sensor_day is not None:
+            date_key = self.forecast.get_date_key(sensor_day)
+            days = {date_key: days.get(date_key, [])}
+        return {
+            "location_name": self.config["location_name"],
+            "height_metric": self.forecast.height_metric,
+            "variable_metrics": dict(self.forecast.marine.extra_metrics),
+            "days": dict(days)
+        }
+
+    def update_sensors(self):
+        """Update the state of every sensor from the current data."""
+        for sensor in self.sensors:
+            sensor.update_state(self.forecast)
+
+    def _set_data(self, data):
+        """Validate a marine API response and store it with its parsed forecast.
+
+        Locations in the same grid cell get the same response, which is only
+        parsed once. Days that did not change since the last response are
+        carried over from the previous forecast.
+
+        Raises:
+            vol.Invalid: The response is missing fields or has malformed values.
+
+        """
+
+        from .forecast import ParsedForecast  # noqa: PLC0415
+        from .model import MarineForecast  # noqa: PLC0415
+
+        scheduler = get_scheduler(self.hass)
+        forecast = scheduler.get_parsed(self.params, data)
+        if forecast is None:
+            with self.metrics.timer("validate"):
+                marine = MarineForecast(data)
+            forecast = ParsedForecast(marine, self.forecast_days, self.forecast)
+            scheduler.set_parsed(self.params, data, forecast)
+            self.metrics.increment("changed_days", len(forecast.changed_days))
+        self.forecast = forecast
+        self.data = data
+
+    def _fetched_time(self):
+        """Get when the current response was fetched from the API."""
+        fetched = get_scheduler(self.hass).cache.get_fetched(self.params)
+        if fetched is None:
+            return dt_util.utcnow()
+        return datetime.fromtimestamp(fetched, timezone.utc)
+
+    def _write_states(self):
+        """Write the sensor states after a failed update, so availability changes are reported.
+
+        The ranking drops the location's windows once its forecast is stale.
+        """
+
+        for sensor in self.sensors:
+            sensor.write_state()
+        get_ranking(self.hass).update(self)
@@ -0,0 +1,37 @@
+"""Diagnostics support for the Swell Forecast integration."""
+
+from homeassistant.components.diagnostics import async_redact_data  # type: ignore
+from homeassistant.config_entries import ConfigEntry  # type: ignore
+from homeassistant.core import HomeAssistant  # type: ignore
+
+from .api import get_scheduler
+from .const import DOMAIN
+from .timestamps import cache_info
+
+TO_REDACT = {"location_latitude", "location_longitude"}
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry):
+    """Return the fetch metrics and stage timings of a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    scheduler = get_scheduler(hass)
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options)
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "last_success": coordinator.last_success.isoformat() if coordinator.last_success else None,
+            "last_attempt": coordinator.last_attempt.isoformat() if coordinator.last_attempt else None,
+            "is_stale": coordinator.is_stale,
+            "skipped_writes": coordinator.skipped_writes,
+            "variable_metrics": dict(coordinator.forecast.marine.extra_metrics) if coordinator.forecast else None,
+            "metrics": coordinator.metrics.as_dict(),
+            "history": coordinator.history.as_dict(),
+            "last_profile": coordinator.last_profile
+        },
+        "scheduler": {
+            "metrics": scheduler.metrics.as_dict(),
+            "timestamp_caches": cache_info()
+        }
+    }
@@ -0,0 +1,200 @@
+"""Parsed forecast shared by every sensor of a location."""
+
+from types import MappingProxyType
+
+import voluptuous as vol  # type: ignore
+
+from .columns import load_columns
+from .model import MarineForecast
+from .timestamps import get_forecast_dates
+
+def parse_forecasts(responses):
+    """Validate and parse a batch of responses, with their day buckets.
+
+    Runs in an executor thread for large batches, so it only reads the
+    previous forecasts it is given and shares nothing else with the event
+    loop.
+
+    Args:
+        responses (list): The (data, days, previous) of each location, where
+            previous is the location's last ParsedForecast or None.
+
+    Returns:
+        list: The ParsedForecast of each response, or None if it is not valid.
+
+    """
+
+    forecasts = []
+    for data, days, previous in responses:
+        try:
+            forecast = ParsedForecast(MarineForecast(data), days, previous)
+        except vol.Invalid:
+            # Parsed again by the coordinator, which reports the error
+            forecasts.append(None)
+            continue
+        forecast.days  # noqa: B018
+        forecasts.append(forecast)
+    return forecasts
+
+class ParsedForecast:
+    """A marine forecast parsed once per update.
+
+    The date keys and optimal waves are built on creation, and the day buckets
+    on first use. All are shared read-only by the current day sensor and every
+    day forecast sensor.
+
+    Given the forecast of the previous response, only the days whose slots
+    changed are rebuilt; the buckets, optimal waves and sensor summaries of
+    the other days are carried over.
+    """
+
+    __slots__ = (
+        "_columns",
+        "_days",
+        "_previous_days",
+        "_previous_summaries",
+        "_summaries",
+        "changed_days",
+        "date_keys",
+        "dates",
+        "height_metric",
+        "marine",
+        "optimal_waves",
+    )
+
+    def __init__(self, marine, days=5, previous=None):
+        """Parse the marine forecast.
+
+        Args:
+            marine (MarineForecast): The validated marine API response.
+            days (int): The number of forecast days to prepare date keys for.
+            previous (ParsedForecast): The forecast of the previous response
+                for the same location, to carry unchanged days over from.
+
+        """
+
+        self.marine = marine
+        self.height_metric = marine.wave_metric
+        self.dates, self.date_keys = get_forecast_dates(marine.current_time, days)
+        self._columns = load_columns(marine.times, marine.wave_heights, marine.swell_heights, marine.extra_columns)
+        self._days = None
+        self._previous_days = None
+        self._summaries = {}
+        self._previous_summaries = None
+
+        if previous is not None and (
+            previous.marine.wave_height_metric != marine.wave_height_metric
+            or previous.marine.swell_height_metric != marine.swell_height_metric
+        ):
+            previous = None
+        if previous is None:
+            self.changed_days = frozenset(self._columns.date_keys)
+            self.optimal_waves = MappingProxyType(self._columns.optimal_waves(
+                marine.wave_height_metric, marine.swell_height_metric
+            ))
+            return
+
+        self.changed_days = self._columns.changed_days(previous._columns)
+        rebuilt = self._columns.optimal_waves(marine.wave_height_metric, marine.swell_height_metric, self.changed_days)
+        self.optimal_waves = MappingProxyType({
+            date_key: rebuilt[date_key] if date_key in rebuilt else previous.optimal_waves[date_key]
+            for date_key in self._columns.date_keys
+        })
+        # Only the buckets and summaries the previous forecast already built can be reused
+        self._previous_days = previous._days
+        self._previous_summaries = previous._summaries
+
+    @property
+    def days(self):
+        """Return the forecast slots of each day, built on first use."""
+        if self._days is None:
+            previous_days = self._previous_days
+            if previous_days is None:
+                days = self._columns.split()
+            else:
+                rebuilt = self._columns.split(self.changed_days)
+                days = {
+                    date_key: rebuilt[date_key] if date_key in rebuilt else previous_days[date_key]
+                    for date_key in self._columns.date_keys
+                }
+            self._days = MappingProxyType(days)
+            self._previous_days = None
+        return self._days
+
+    def get_date(self, sensor_day):
+        """Get the date of a forecast day, where day 1 is the current day."""
+        return self.dates[sensor_day - 1]
+
+    def get_date_key(self, sensor_day):
+        """Get the date key of a forecast day, where day 1 is the current day."""
+        return self.date_keys[sensor_day - 1]
+
+    def get_day(self, date_key):
+        """Get the forecast slots for a date key."""
+        return self.days.get(date_key, [])
+
+    def get_optimal_wave(self, date_key):
+        """Get the optimal wave for a date key."""
+        if date_key not in self.optimal_waves:
+            return None
+        return self.optimal_waves[date_key]
+
+    def get_peak_time(self, date_key):
+        """Get the ISO 8601 time of a day's highest wave, or None if it has no wave."""
+        columns = self._columns
+        if date_key not in columns.date_keys:
+            return None
+        peak = columns.wave_peaks[columns.date_keys.index(date_key)]
+        return None if peak is None else self.marine.times[peak]
+
+    def get_summary(self, date_key, compact=False):
+        """Get the attributes of a day sensor, built once per day.
+
+        Summaries are read-only and shared by every sensor showing the day.
+        While the day's slots do not change, the following forecasts reuse
+        its slots and optimal wave, and only move the update date on.
+
+        Args:
+            date_key (str): The 'YYYYMMDD' key of the day.
+            compact (bool): Only summarise the day's peaks, without the slots.
+
+        Returns:
+            MappingProxyType: The attributes of the day.
+
+        """
+
+        key = (date_key, compact)
+        summary = self._summaries.get(key)
+        if summary is None:
+            updated = self.dates[self.date_keys.index(date_key)]
+            if self._previous_summaries is not None and date_key not in self.changed_days:
+                summary = self._previous_summaries.get(key)
+            if summary is None:
+                summary = MappingProxyType(self._build_summary(date_key, compact, updated))
+            elif summary["updated"] != updated:
+                summary = MappingProxyType(dict(summary, updated=updated))
+            self._summaries[key] = summary
+        return summary
+
+    def _build_summary(self, date_key, compact, updated):
+        """Build the attributes of a day sensor."""
+        optimal = self.get_optimal_wave(date_key)
+        if not compact:
+            return {
+                "forecast": tuple(self.get_day(date_key)),
+                "height_metric": self.height_metric,
+                "optimal_wave": optimal,
+                "updated": updated
+            }
+
+        summary = {"height_metric": self.height_metric}
+        if optimal is not None:
+            for name in ("wave", "swell"):
+                peak = optimal[name]
+                summary[name + "_max_height"] = peak["max_height"]
+                summary[name + "_max_time"] = peak["max_time"]
+                for scale in ("douglas_scale", "face_scale"):
+                    score = peak["score"][scale]
+                    summary[name + "_" + scale] = None if score is None else score["score"]
+        summary["updated"] = updated
+        return summary
@@ -0,0 +1,75 @@
+"""Index of the marine model grid cells configured locations fall in."""
+
+from .const import COORDINATE_PRECISION
+
+def location_key(latitude, longitude):
+    """Get the index key of a coordinate.
+
+    Args:
+        latitude (str): The latitude, as configured or as sent by the API.
+        longitude (str): The longitude, as configured or as sent by the API.
+
+    Returns:
+        str: The coordinate rounded to COORDINATE_PRECISION decimals, or the
+        raw values if they are not numbers.
+
+    """
+
+    try:
+        return f"{float(latitude):.{COORDINATE_PRECISION}f},{float(longitude):.{COORDINATE_PRECISION}f}"
+    except (TypeError, ValueError):
+        return f"{latitude},{longitude}"
+
+class GridIndex:
+    """Snap configured coordinates to the model grid cell the API answers with.
+
+    The marine model is gridded, so beaches a few hundred metres apart are
+    forecast from the same cell. Once a response has shown which cell a
+    location falls in, its requests are made with the cell's coordinates so
+    every location in the cell shares one request and one cache entry.
+    """
+
+    def __init__(self, cells=None):
+        """Initialize the index.
+
+        Args:
+            cells (dict): Stored cells, by location key, as [latitude, longitude].
+
+        """
+
+        self.cells = cells or {}
+
+    def snap(self, params):
+        """Get the query parameters of a location with its cell's coordinates.
+
+        Returns:
+            dict: The parameters, unchanged if the cell is not known yet.
+
+        """
+
+        cell = self.cells.get(location_key(params["latitude"], params["longitude"]))
+        if cell is None:
+            return params
+        return dict(params, latitude=cell[0], longitude=cell[1])
+
+    def learn(self, params, data):
+        """Record the cell a request was answered from.
+
+        Args:
+            params (dict): The query parameters of a single location.
+            data (dict): The API response of that location.
+
+        Returns:
+            bool: True if the index changed.
+
+        """
+
+        if not isinstance(data, dict) or data.get("latitude") is None or data.get("longitude") is None:
+            return False
+        cell = [str(data["latitude"]), str(data["longitude"])]
+        changed = False
+        for key in (location_key(params["latitude"], params["longitude"]), location_key(*cell)):
+            if self.cells.get(key) != cell:
+                self.cells[key] = cell
+                changed = True
+        return changed
@@ -0,0 +1,344 @@
+"""Compact history of forecast and observed wave heights per location."""
+
+from array import array
+import asyncio
+from bisect import bisect_right
+from datetime import datetime, timezone
+import logging
+import math
+import os
+import struct
+import time
+
+from homeassistant.core import HomeAssistant  # type: ignore
+
+from .const import (
+    DOMAIN,
+    HISTORY_COMPACT_FACTOR,
+    HISTORY_FORECAST_CAPACITY,
+    HISTORY_MAX_AGE,
+    HISTORY_MIN_ROWS,
+    HISTORY_OBSERVED_CAPACITY,
+)
+from .timestamps import parse_timestamp
+
+_LOGGER = logging.getLogger(__name__)
+
+# Kind, issued and valid timestamps, wave and swell height
+RECORD = struct.Struct("<Bddff")
+OBSERVED = 0
+FORECAST = 1
+
+def to_epochs(times, utc_offset=0):
+    """Convert the local ISO 8601 times of a response to UTC timestamps.
+
+    Args:
+        times (list): The 'YYYY-MM-DDTHH:MM' times, in the location's time zone.
+        utc_offset (int): The offset of that time zone, in seconds.
+
+    Returns:
+        array: The timestamps, as array('d').
+
+    """
+
+    # Imported here so loading the history at startup does not import NumPy
+    from .columns import np  # noqa: PLC0415
+
+    if np is not None and times:
+        stamps = np.asarray([value.rstrip("Z") for value in times], dtype="datetime64[m]")
+        return array("d", (stamps.astype("int64") * 60 - utc_offset).astype(float).tobytes())
+    return array("d", (
+        parse_timestamp(value.rstrip("Z")).replace(tzinfo=timezone.utc).timestamp() - utc_offset
+        for value in times
+    ))
+
+def _height(value):
+    """Get a stored height, with NaN as None."""
+    if math.isnan(value):
+        return None
+    return round(value, 2)
+
+def _iso(timestamp):
+    """Format a UTC timestamp."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+class HistoryRing:
+    """A bounded ring of (issued, valid, wave, swell) rows in typed arrays.
+
+    The arrays grow as rows are added, up to the capacity. When full, each
+    new row overwrites the oldest.
+    """
+
+    __slots__ = ("_issued", "_size", "_start", "_swells", "_times", "_waves", "capacity")
+
+    def __init__(self, capacity):
+        """Initialize an empty ring."""
+        self.capacity = capacity
+        self._issued = array("d")
+        self._times = array("d")
+        self._waves = array("f")
+        self._swells = array("f")
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        """Return the number of rows."""
+        return self._size
+
+    def append(self, issued, valid, wave, swell):
+        """Add a row, evicting the oldest if the ring is full."""
+        if self._size == len(self._issued) < self.capacity:
+            self._grow()
+        allocated = len(self._issued)
+        index = (self._start + self._size) % allocated
+        if self._size == allocated:
+            self._start = (self._start + 1) % allocated
+        else:
+            self._size += 1
+        self._issued[index] = issued
+        self._times[index] = valid
+        self._waves[index] = wave
+        self._swells[index] = swell
+
+    def evict(self, before):
+        """Drop the oldest rows issued before a timestamp."""
+        allocated = len(self._issued)
+        while self._size and self._issued[self._start] < before:
+            self._start = (self._start + 1) % allocated
+            self._size -= 1
+
+    def rows(self):
+        """Iterate over the rows, oldest first."""
+        allocated = len(self._issued)
+        for offset in range(self._size):
+            index = (self._start + offset) % allocated
+            yield self._issued[index], self._times[index], self._waves[index], self._swells[index]
+
+    def last_issued(self):
+        """Get when the newest row was issued, or None if the ring is empty."""
+        if not self._size:
+            return None
+        return self._issued[(self._start + self._size - 1) % len(self._issued)]
+
+    def _grow(self):
+        """Double the arrays, up to the capacity, moving the oldest row to the front."""
+        start = self._start
+        extra = min(self.capacity, max(HISTORY_MIN_ROWS, 2 * len(self._issued))) - len(self._issued)
+        self._issued = self._issued[start:] + self._issued[:start] + array("d", bytes(8 * extra))
+        self._times = self._times[start:] + self._times[:start] + array("d", bytes(8 * extra))
+        self._waves = self._waves[start:] + self._waves[:start] + array("f", bytes(4 * extra))
+        self._swells = self._swells[start:] + self._swells[:start] + array("f", bytes(4 * extra))
+        self._start = 0
+
+class LocationHistory:
+    """Observed and forecast wave heights of a location.
+
+    Rows are kept in two bounded rings in memory and appended to a binary
+    file in .storage, which is rewritten with only the live rows once it
+    grows past HISTORY_COMPACT_FACTOR times the rings' capacity.
+    """
+
+    def __init__(self, hass: HomeAssistant, key):
+        """Initialize the history.
+
+        Args:
+            hass (HomeAssistant): The Home Assistant instance.
+            key (str): The location's cleaned name, used in the file name.
+
+        """
+
+        self.hass = hass
+        self.path = hass.config.path(".storage", f"{DOMAIN}.history.{key}")
+        self.observed = HistoryRing(HISTORY_OBSERVED_CAPACITY)
+        self.forecast = HistoryRing(HISTORY_FORECAST_CAPACITY)
+        self._file_rows = 0
+        self._load_task = None
+
+    async def async_load(self):
+        """Load the history file, once, with concurrent callers waiting for the same load."""
+        if self._load_task is None:
+            self._load_task = self.hass.async_create_task(self._async_load())
+        await asyncio.shield(self._load_task)
+
+    async def _async_load(self):
+        """Read the history file into the rings."""
+        try:
+            content = await self.hass.async_add_executor_job(self._read)
+        except OSError as e:
+            _LOGGER.warning("Swell forecast - Could not read the history file: %s", e)
+            return
+        usable = len(content) - len(content) % RECORD.size
+        for kind, issued, valid, wave, swell in RECORD.iter_unpack(content[:usable]):
+            ring = self.observed if kind == OBSERVED else self.forecast
+            ring.append(issued, valid, wave, swell)
+        self._file_rows = usable // RECORD.size
+        self._evict()
+
+    async def async_record(self, forecast, issued):
+        """Add the current reading and, if it is new, the forecast of an update.
+
+        Args:
+            forecast (ParsedForecast): The forecast of the update.
+            issued (float): When the response was fetched, as a timestamp.
+
+        """
+
+        await self.async_load()
+        marine = forecast.marine
+        records = []
+        observed_at = to_epochs([marine.current_time], marine.utc_offset)[0]
+        if self.observed.last_issued() is None or observed_at > self.observed.last_issued():
+            self.observed.append(observed_at, observed_at, marine.current_wave_height, marine.current_swell_height)
+            records.append(RECORD.pack(
+                OBSERVED, observed_at, observed_at, marine.current_wave_height, marine.current_swell_height
+            ))
+
+        if forecast.changed_days and (self.forecast.last_issued() is None or issued > self.forecast.last_issued()):
+            valid_times = to_epochs(marine.times, marine.utc_offset)
+            for valid, wave, swell in zip(valid_times, marine.wave_heights, marine.swell_heights):
+                self.forecast.append(issued, valid, wave, swell)
+                records.append(RECORD.pack(FORECAST, issued, valid, wave, swell))
+
+        self._evict()
+        if not records:
+            return
+        self._file_rows += len(records)
+        compact = self._file_rows > HISTORY_COMPACT_FACTOR * (self.observed.capacity + self.forecast.capacity)
+        if compact:
+            records = [
+                RECORD.pack(kind, *row)
+                for kind, ring in ((OBSERVED, self.observed), (FORECAST, self.forecast))
+                for row in ring.rows()
+            ]
+            self._file_rows = len(records)
+        try:
+            await self.hass.async_add_executor_job(self._write, b"".join(records), compact)
+        except OSError as e:
+            _LOGGER.warning("Swell forecast - Could not write the history file: %s", e)
+
+    def get_observed(self, start, end):
+        """Get the observed heights between two timestamps.
+
+        Returns:
+            list: A dict of the time, wave height and swell height of each reading.
+
+        """
+
+        return [
+            {"time": _iso(valid), "wave_height": _height(wave), "swell_height": _height(swell)}
+            for _, valid, wave, swell in self.observed.rows()
+            if start <= valid <= end
+        ]
+
+    def get_latest_forecast(self, start, end):
+        """Get the most recently issued forecast of each slot between two timestamps.
+
+        Returns:
+            dict: The (issued, wave, swell) of each slot, keyed by timestamp.
+
+        """
+
+        latest = {}
+        for issued, valid, wave, swell in self.forecast.rows():
+            if start <= valid <= end:
+                latest[valid] = (issued, wave, swell)
+        return latest
+
+    def get_skill(self, lead_hours):
+        """Compare the readings with the forecasts issued at least lead_hours before.
+
+        Each reading is compared with the forecast slot it falls in, from the
+        start of the slot up to the next one.
+
+        Returns:
+            dict: The number of matched readings and the mean absolute error
+            and bias of the wave and swell heights.
+
+        """
+
+        lead = lead_hours * 3600
+        # The latest forecast of each slot issued early enough
+        forecasts = {}
+        for issued, valid, wave, swell in self.forecast.rows():
+            if valid - issued >= lead:
+                forecasts[valid] = (wave, swell)
+
+        # Readings come every 15 minutes, so each is matched to the slot it falls in
+        slots = sorted(forecasts)
+        step = min((end - start for start, end in zip(slots, slots[1:])), default=3600)
+        errors = {"wave": [], "swell": []}
+        for _, observed_at, wave, swell in self.observed.rows():
+            index = bisect_right(slots, observed_at) - 1
+            if index < 0 or observed_at - slots[index] >= step:
+                continue
+            forecast = forecasts[slots[index]]
+            for name, observed, predicted in (("wave", wave, forecast[0]), ("swell", swell, forecast[1])):
+                if not math.isnan(observed) and not math.isnan(predicted):
+                    errors[name].append(predicted - observed)
+
+        skill = {"lead_hours": lead_hours, "count": len(errors["wave"])}
+        for name, values in errors.items():
+            skill[name + "_mae"] = round(sum(abs(value) for value in values) / len(values), 3) if values else None
+            skill[name + "_bias"] = round(sum(values) / len(values), 3) if values else None
+        return skill
+
+    def get_best_session(self, start, end):
+        """Get the slot with the highest forecast wave between two timestamps.
+
+        Returns:
+            dict: The time, wave height and swell height of the slot, or None.
+
+        """
+
+        best = None
+        for valid, (_, wave, swell) in self.get_latest_forecast(start, end).items():
+            if not math.isnan(wave) and (best is None or wave > best[1]):
+                best = (valid, wave, swell)
+        if best is None:
+            return None
+        return {"time": _iso(best[0]), "wave_height": _height(best[1]), "swell_height": _height(best[2])}
+
+    def as_dict(self):
+        """Get the size of the history, for diagnostics."""
+        return {
+            "observed_rows": len(self.observed),
+            "forecast_rows": len(self.forecast),
+            "file_rows": self._file_rows
+        }
+
+    def _evict(self):
+        """Drop rows older than HISTORY_MAX_AGE."""
+        before = time.time() - HISTORY_MAX_AGE
+        self.observed.evict(before)
+        self.forecast.evict(before)
+
+    async def async_remove(self):
+        """Delete the history file, when its entry is removed."""
+        try:
+            await self.hass.async_add_executor_job(self._remove)
+        except OSError as e:
+            _LOGGER.warning("Swell forecast - Could not remove the history file: %s", e)
+
+    def _remove(self):
+        """Delete the history file and any unfinished compaction."""
+        for path in (self.path, self.path + ".tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _read(self):
+        """Read the history file."""
+        if not os.path.exists(self.path):
+            return b""
+        with open(self.path, "rb") as file:
+            return file.read()
+
+    def _write(self, content, replace):
+        """Append to the history file, or replace it when compacting."""
+        if replace:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "wb") as file:
+                file.write(content)
+            os.replace(temp_path, self.path)
+            return
+        with open(self.path, "ab") as file:
+            file.write(content)
@@ -0,0 +1,69 @@
+"""Lightweight counters and stage timings of the update path."""
+
+from contextlib import contextmanager
+import time
+
+class Metrics:
+    """Counters, HTTP status codes and stage durations.
+
+    Stages are timed with perf_counter, so recording them costs far less than
+    the work being measured.
+    """
+
+    def __init__(self):
+        """Initialize empty metrics."""
+        self.counters = {}
+        self.status_codes = {}
+        self.stages = {}
+
+    def increment(self, name, amount=1):
+        """Add to a counter."""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_status(self, status):
+        """Count an HTTP status code."""
+        self.status_codes[status] = self.status_codes.get(status, 0) + 1
+
+    def record_stage(self, stage, duration):
+        """Record the duration of a stage in seconds."""
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = {"count": 0, "last_ms": 0.0, "max_ms": 0.0, "total_ms": 0.0}
+        duration_ms = duration * 1000
+        stats["count"] += 1
+        stats["last_ms"] = duration_ms
+        stats["total_ms"] += duration_ms
+        if duration_ms > stats["max_ms"]:
+            stats["max_ms"] = duration_ms
+
+    @contextmanager
+    def timer(self, stage):
+        """Time the body of a with block as a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(stage, time.perf_counter() - start)
+
+    def get_last_ms(self, stage):
+        """Get the last duration of a stage in ms, or None if it never ran."""
+        stats = self.stages.get(stage)
+        if stats is None:
+            return None
+        return round(stats["last_ms"], 2)
+
+    def as_dict(self):
+        """Get the metrics as a JSON serializable dict."""
+        return {
+            "counters": dict(self.counters),
+            "status_codes": {str(status): count for status, count in self.status_codes.items()},
+            "stages": {
+                stage: {
+                    "count": stats["count"],
+                    "last_ms": round(stats["last_ms"], 2),
+                    "max_ms": round(stats["max_ms"], 2),
+                    "mean_ms": round(stats["total_ms"] / stats["count"], 2)
+                }
+                for stage, stats in self.stages.items()
+            }
+        }
@@ -0,0 +1,143 @@
+"""Typed model of a marine API response, validated once when decoded."""
+
+from array import array
+from datetime import datetime
+import re
+
+import voluptuous as vol  # type: ignore
+
+from .const import EXTRA_HOURLY_VARIABLES
+from .stream import to_array
+
+# Times are sliced by position when grouped into days, so their layout is checked too
+TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}")
+
+def _number_list(value):
+    """Validate a list of numbers, where missing values are None."""
+    if isinstance(value, array):
+        # Already decoded into a column of doubles
+        return value
+    if not isinstance(value, list):
+        raise vol.Invalid("expected a list")
+    for item in value:
+        if item is not None and (not isinstance(item, (int, float)) or isinstance(item, bool)):
+            raise vol.Invalid(f"expected a number or null, got {item!r}")
+    return value
+
+def _timestamp(value):
+    """Validate a 'YYYY-MM-DDTHH:MM' ISO 8601 time."""
+    if not isinstance(value, str) or not TIMESTAMP.match(value):
+        raise vol.Invalid(f"expected an ISO 8601 time, got {value!r}")
+    try:
+        datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError as e:
+        raise vol.Invalid(f"invalid time {value!r}: {e}") from e
+    return value
+
+def _timestamp_list(value):
+    """Validate a list of ISO 8601 times."""
+    if not isinstance(value, list):
+        raise vol.Invalid("expected a list of times")
+    for item in value:
+        _timestamp(item)
+    return value
+
+def _equal_lengths(value):
+    """Validate that every hourly column has one value per time."""
+    length = len(value["time"])
+    for key in ("wave_height", "swell_wave_height", *EXTRA_HOURLY_VARIABLES):
+        if key in value and len(value[key]) != length:
+            raise vol.Invalid(f"expected {length} values, got {len(value[key])}", path=[key])
+    return value
+
+# Compiled once at import, not on every update
+CURRENT_SCHEMA = vol.Schema({
+    vol.Required("time"): _timestamp,
+    vol.Required("swell_wave_height"): vol.Any(int, float),
+    vol.Required("wave_height"): vol.Any(int, float),
+}, extra=vol.ALLOW_EXTRA)
+
+UNITS_SCHEMA = vol.Schema({
+    vol.Required("swell_wave_height"): str,
+    vol.Required("wave_height"): str,
+}, extra=vol.ALLOW_EXTRA)
+
+HOURLY_SCHEMA = vol.All(vol.Schema({
+    vol.Required("time"): _timestamp_list,
+    vol.Required("wave_height"): _number_list,
+    vol.Required("swell_wave_height"): _number_list,
+    **{vol.Optional(variable): _number_list for variable in EXTRA_HOURLY_VARIABLES},
+}, extra=vol.ALLOW_EXTRA), _equal_lengths)
+
+MARINE_SCHEMA = vol.Schema({
+    vol.Required("current"): CURRENT_SCHEMA,
+    vol.Required("current_units"): UNITS_SCHEMA,
+    vol.Required("hourly"): HOURLY_SCHEMA,
+    vol.Required("hourly_units"): UNITS_SCHEMA,
+}, extra=vol.ALLOW_EXTRA)
+
+class MarineForecast:
+    """The fields of a marine API response the sensors use.
+
+    The hourly heights, and any extra hourly variables, are stored as
+    array('d') columns, which NumPy reads without copying.
+    """
+
+    __slots__ = (
+        "current_interval",
+        "current_swell_height",
+        "current_time",
+        "current_wave_height",
+        "extra_columns",
+        "extra_metrics",
+        "swell_height_metric",
+        "swell_metric",
+        "times",
+        "utc_offset",
+        "wave_height_metric",
+        "wave_heights",
+        "wave_metric",
+        "swell_heights",
+    )
+
+    def __init__(self, data):
+        """Validate and load a marine API response.
+
+        Args:
+            data (dict): The marine API response for a single location.
+
+        Raises:
+            vol.Invalid: The response is missing fields or has malformed values.
+
+        """
+
+        MARINE_SCHEMA(data)
+        current = data["current"]
+        current_units = data["current_units"]
+        hourly = data["hourly"]
+        self.current_time = current["time"]
+        self.current_wave_height = current["wave_height"]
+        self.current_swell_height = current["swell_wave_height"]
+        self.wave_metric = current_units["wave_height"]
+        self.swell_metric = current_units["swell_wave_height"]
+
+        # The update interval in minutes, as shown on the current sensor
+        self.current_interval = None
+        if current_units.get("interval") == "seconds":
+            self.current_interval = current["interval"] / 60
+        if current_units.get("interval") == "minutes":
+            self.current_interval = current["interval"]
+
+        self.times = hourly["time"]
+        self.utc_offset = data.get("utc_offset_seconds") or 0
+        self.wave_heights = to_array(hourly["wave_height"])
+        self.swell_heights = to_array(hourly["swell_wave_height"])
+        # Optional hourly variables, only present when enabled in the options
+        self.extra_columns = {
+            variable: to_array(hourly[variable]) for variable in EXTRA_HOURLY_VARIABLES if variable in hourly
+        }
+        self.extra_metrics = {
+            variable: data["hourly_units"].get(variable) for variable in self.extra_columns
+        }
+        self.wave_height_metric = data["hourly_units"]["wave_height"]
+        self.swell_height_metric = data["hourly_units"]["swell_wave_height"]
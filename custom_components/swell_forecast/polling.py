@@ -0,0 +1,59 @@
+"""Poll timing aligned to the marine model runs."""
+
+from datetime import datetime, timedelta, timezone
+import math
+import random
+
+from .const import (
+    MAX_POLL_INTERVAL,
+    MODEL_OUTPUT_DELAY,
+    MODEL_RUN_HOURS,
+    POLL_JITTER,
+    POLL_OFFSET,
+    SCAN_INTERVAL,
+)
+
+def next_model_output(now):
+    """Predict when the output of the next marine model run will land.
+
+    Args:
+        now (datetime): The current time, timezone aware.
+
+    Returns:
+        datetime: The expected time the next model run can be fetched.
+
+    """
+
+    midnight = now.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    for day in (-1, 0, 1):
+        for hour in MODEL_RUN_HOURS:
+            output = midnight + timedelta(days=day, hours=hour) + MODEL_OUTPUT_DELAY
+            if output > now:
+                return output
+    return midnight + timedelta(days=2)
+
+def next_poll_time(now, unchanged_polls=0, current_interval=None):
+    """Get when to poll next.
+
+    The poll interval doubles every time the forecast comes back unchanged,
+    up to MAX_POLL_INTERVAL, but never runs past the next model output.
+    Polls land just after a boundary of the API's current interval, when the
+    current readings roll over, and are spread with a random jitter.
+
+    Args:
+        now (datetime): The current time, timezone aware.
+        unchanged_polls (int): The number of polls in a row without changes.
+        current_interval (int): The API's current interval in seconds, or None.
+
+    Returns:
+        datetime: The time of the next poll.
+
+    """
+
+    delay = min(SCAN_INTERVAL * 2 ** min(unchanged_polls, 8), MAX_POLL_INTERVAL)
+    target = now + delay
+    if current_interval:
+        aligned = math.ceil(target.timestamp() / current_interval) * current_interval
+        target = datetime.fromtimestamp(aligned, timezone.utc) + POLL_OFFSET
+    target = min(target, next_model_output(now) + POLL_OFFSET)
+    return target + timedelta(seconds=random.uniform(0, POLL_JITTER))  # noqa: S311
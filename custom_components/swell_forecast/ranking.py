@@ -0,0 +1,155 @@
+"""Ranking of the best surf windows across every configured location."""
+
+from datetime import datetime, timezone
+import heapq
+from itertools import chain
+from operator import itemgetter
+import time
+
+from homeassistant.core import HomeAssistant  # type: ignore
+
+from .const import DATA_RANKING, DOMAIN, RANKING_SIZE
+
+FEET_PER_METRE = 3.28084
+
+def get_ranking(hass: HomeAssistant):
+    """Get the shared ranking, creating it on first use."""
+
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_RANKING not in domain_data:
+        domain_data[DATA_RANKING] = SpotRanking()
+    return domain_data[DATA_RANKING]
+
+def local_hour(forecast, now=None):
+    """Get the start of the current hour in a forecast's time zone.
+
+    Args:
+        forecast (ParsedForecast): The forecast of a location.
+        now (float): The current timestamp, or None for the current time.
+
+    Returns:
+        str: The hour as a 'YYYY-MM-DDTHH:00' time, comparable to the slot times.
+
+    """
+
+    now = time.time() if now is None else now
+    return datetime.fromtimestamp(now + forecast.marine.utc_offset, timezone.utc).strftime("%Y-%m-%dT%H:00")
+
+def get_windows(location_name, forecast, now=None):
+    """Get the scored window of each forecast day of a location.
+
+    A day's window is its optimal wave, as already parsed and scored for the
+    day sensors. Windows are ordered by face scale score, then by wave
+    height in metres, preferring the earlier day on ties. Windows before
+    the current hour have passed and are left out.
+
+    Args:
+        location_name (str): The name of the location.
+        forecast (ParsedForecast): The location's current forecast.
+        now (float): The current timestamp, or None for the current time.
+
+    Returns:
+        list: The (sort key, window) of each day with a forecast.
+
+    """
+
+    hour = local_hour(forecast, now)
+    windows = []
+    for day, (date, date_key) in enumerate(zip(forecast.dates, forecast.date_keys)):
+        optimal = forecast.get_optimal_wave(date_key)
+        if optimal is None or optimal["wave"]["max"] is None:
+            continue
+        peak_time = forecast.get_peak_time(date_key)
+        if peak_time is not None and peak_time < hour:
+            continue
+        wave = optimal["wave"]
+        face = wave["score"]["face_scale"]
+        douglas = wave["score"]["douglas_scale"]
+        if face is None:
+            continue
+        height = wave["max_height"]
+        if forecast.height_metric == "ft":
+            height = height / FEET_PER_METRE
+        windows.append(((face["score"], height, -day), {
+            "location_name": location_name,
+            "date": date.date().isoformat(),
+            "time": wave["max_time"],
+            "wave_height": wave["max_height"],
+            "swell_height": optimal["swell"]["max_height"],
+            "height_metric": forecast.height_metric,
+            "face_scale": face["score"],
+            "face_scale_description": face["description"],
+            "douglas_scale": None if douglas is None else douglas["score"]
+        }))
+    return windows
+
+class SpotRanking:
+    """Keep the top windows of every location, updated one location at a time.
+
+    Each location's best windows are rebuilt only when its forecast changes,
+    becomes stale or the hour moves on, and the overall top is merged from
+    the per-location tops.
+
+    The summary sensor is added by one loaded entry, sensor_entry_id, and
+    handed over to another entry in entity_adders when that entry unloads.
+    """
+
+    def __init__(self, size=RANKING_SIZE):
+        """Initialize an empty ranking."""
+        self.size = size
+        self.top = []
+        self.sensor_entry_id = None
+        self.entity_adders = {}
+        self._locations = {}
+        self._forecasts = {}
+        self._listeners = []
+
+    def update(self, coordinator):
+        """Rank the windows of a coordinator's current forecast."""
+        forecast = None if coordinator.is_stale else coordinator.forecast
+        version = None if forecast is None else (forecast, local_hour(forecast))
+        if version == self._forecasts.get(coordinator) and coordinator in self._locations:
+            return
+        self._forecasts[coordinator] = version
+        windows = [] if forecast is None else get_windows(coordinator.config["location_name"], forecast)
+        self._locations[coordinator] = heapq.nlargest(self.size, windows, key=itemgetter(0))
+        self._merge()
+
+    def remove(self, coordinator):
+        """Drop a location that was unloaded."""
+        self._forecasts.pop(coordinator, None)
+        if self._locations.pop(coordinator, None) is not None:
+            self._merge()
+
+    def get_top(self, limit=None):
+        """Get the best windows, best first."""
+        return self.top[:limit]
+
+    def add_listener(self, listener):
+        """Add a callback run when the top windows change.
+
+        Returns:
+            callable: A callback that removes the listener.
+
+        """
+
+        self._listeners.append(listener)
+
+        def remove():
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return remove
+
+    def _merge(self):
+        """Merge the per-location tops, notifying listeners if the result changed."""
+        top = [
+            window for _, window in heapq.nlargest(
+                self.size, chain.from_iterable(self._locations.values()), key=itemgetter(0)
+            )
+        ]
+        if top == self.top:
+            return
+        self.top = top
+        for listener in list(self._listeners):
+            listener()
@@ -0,0 +1,96 @@
+"""Retry and circuit breaker helpers for the marine API."""
+
+from email.utils import parsedate_to_datetime
+import random
+import time
+
+from .const import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_TIMEOUT,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+)
+
+def backoff_delay(attempt, retry_after=None):
+    """Get how long to wait before retrying a request.
+
+    Args:
+        attempt (int): The number of attempts made so far, starting at 1.
+        retry_after (float): The delay the server asked for, in seconds.
+
+    Returns:
+        float: The delay in seconds, with full jitter, capped at RETRY_MAX_DELAY.
+
+    """
+
+    if retry_after is not None:
+        return min(retry_after, RETRY_MAX_DELAY)
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))  # noqa: S311
+
+def parse_retry_after(value, now=None):
+    """Parse a Retry-After header, in seconds or as an HTTP date.
+
+    Returns:
+        float: The delay in seconds, or None if the header is missing or invalid.
+
+    """
+
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at - (now or time.time()))
+
+class CircuitBreaker:
+    """Stop calling a host after repeated failures.
+
+    After BREAKER_FAILURE_THRESHOLD failed requests in a row, or as soon as
+    the server sends a Retry-After, the breaker opens and requests are
+    refused until BREAKER_RESET_TIMEOUT (or the Retry-After) has passed. A
+    single trial request is then let through: success closes the breaker,
+    failure opens it again.
+    """
+
+    def __init__(self):
+        """Initialize a closed breaker."""
+        self.failures = 0
+        self.opened_until = None
+        self._trial = False
+
+    @property
+    def state(self):
+        """Return "closed", "open" or "half_open"."""
+        if self.opened_until is None:
+            return "closed"
+        if time.monotonic() < self.opened_until:
+            return "open"
+        return "half_open"
+
+    def allow_request(self):
+        """Return True if a request may be sent now."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def record_success(self):
+        """Close the breaker after a successful request."""
+        self.failures = 0
+        self.opened_until = None
+        self._trial = False
+
+    def record_failure(self, retry_after=None):
+        """Count a failed request, opening the breaker at the threshold."""
+        self.failures += 1
+        if self._trial or retry_after is not None or self.failures >= BREAKER_FAILURE_THRESHOLD:
+            self.opened_until = time.monotonic() + max(BREAKER_RESET_TIMEOUT, retry_after or 0)
+        self._trial = False
@@ -1,191 +1,103 @@
+from bisect import bisect_right
 import logging
 
 _LOGGER = logging.getLogger(__name__)
 
+# (score, height_min_ft, height_max_ft, height_min_m, height_max_m, desc)
+FACE_SCALE = (
+    (1, 0, 1, 0, 0.30, "Ankle-shin"),
+    (2, 1, 2, 0.30, 0.60, "Knee-thigh"),
+    (3, 2, 3, 0.60, 0.91, "Waist-belly"),
+    (4, 3, 4, 0.91, 1.21, "Chest-shoulder"),
+    (5, 4, 5, 1.21, 1.52, "Head high"),
+    (6, 5, 6, 1.52, 1.82, "1' overhead"),
+    (8, 6, 8, 1.82, 2.43, "3' overhead"),
+    (10, 8, 10, 2.43, 3.04, "3' overhead"),
+    (12, 10, 12, 3.04, 3.65, "2x overhead"),
+    (15, 12, 15, 3.65, 4.57, "3x overhead"),
+    (20, 15, 100, 4.57, 100, "Stupid big"),
+)
+
+DOUGLAS_SCALE = (
+    (1, 0, 0.32, 0, 0.10, "Calm"),
+    (2, 0.32, 1.64, 0.10, 0.50, "Smooth"),
+    (3, 1.64, 4.10, 0.5, 1.25, "Slight"),
+    (4, 4.10, 8.20, 1.25, 2.50, "Moderate"),
+    (5, 8.20, 13.12, 2.50, 4.00, "Rough"),
+    (6, 13.12, 19.68, 4.00, 6.00, "Very Rough"),
+    (7, 19.68, 29.52, 6.00, 9.00, "High"),
+    (8, 29.52, 45.93, 9.00, 14.00, "Very high"),
+    (9, 45.93, 200.00, 14.00, 200.00, "Phenomenal"),
+)
+
+def _compile_scale(rows, scale_name):
+    """Compile a scale table into sorted lower bounds per unit.
+
+    Args:
+        rows (tuple): The scale rows, ordered by height.
+        scale_name (str): The name reported with every score.
+
+    Returns:
+        dict: For each unit, the lower bounds, the upper bound of the last
+        bucket and the score of each bucket.
+
+    """
+
+    results = tuple({
+        "score": score,
+        "description": desc,
+        "scale_name": scale_name
+    } for score, _, _, _, _, desc in rows)
+    return {
+        "ft": (tuple(row[1] for row in rows), rows[-1][2], results),
+        "m": (tuple(row[3] for row in rows), rows[-1][4], results),
+    }
+
+FACE_SCALE_TABLE = _compile_scale(FACE_SCALE, "Face height scale")
+DOUGLAS_SCALE_TABLE = _compile_scale(DOUGLAS_SCALE, "Douglas sea scale")
+
+def _lookup(table, height, metric):
+    """Find the score of a height in a compiled scale.
+
+    Buckets include their lower bound, so boundary heights always score.
+    The returned dicts are shared between calls and must not be modified.
+    """
+
+    compiled = table.get(metric)
+    if compiled is None or height is None:
+        return None
+    bounds, upper, results = compiled
+    if height < 0 or height >= upper:
+        return None
+    return results[bisect_right(bounds, height) - 1]
+
 def get_wave_score(height, metric):
     return {
       "douglas_scale": get_douglas_scale(height, metric),
       "face_scale": get_face_scale(height, metric)
     }
 
+def get_wave_scores(heights, metric):
+    """Score a sequence of heights on both scales in one call.
+
+    Args:
+        heights (iterable): The wave heights to score.
+        metric (str): The unit of the heights, "m" or "ft".
+
+    Returns:
+        list: The score of each height, as returned by get_wave_score.
+
+    """
+
+    douglas = DOUGLAS_SCALE_TABLE
+    face = FACE_SCALE_TABLE
+    return [{
+        "douglas_scale": _lookup(douglas, height, metric),
+        "face_scale": _lookup(face, height, metric)
+    } for height in heights]
+
 def get_face_scale(height, metric):
-    scores = [
-        {
-            "score": 1,
-            "height_min_ft": 0,
-            "height_max_ft": 1,
-            "height_min_m": 0,
-            "height_max_m": 0.30,
-            "desc": "Ankle-shin"
-        },
-        {
-            "score": 2,
-            "height_min_ft": 1,
-            "height_max_ft": 2,
-            "height_min_m": 0.30,
-            "height_max_m": 0.60,
-            "desc": "Knee-thigh"
-        },
-        {
-            "score": 3,
-            "height_min_ft": 2,
-            "height_max_ft": 3,
-            "height_min_m": 0.60,
-            "height_max_m": 0.91,
-            "desc": "Waist-belly"
-        },
-        {
-            "score": 4,
-            "height_min_ft": 3,
-            "height_max_ft": 4,
-            "height_min_m": 0.91,
-            "height_max_m": 1.21,
-            "desc": "Chest-shoulder"
-        },
-        {
-            "score": 5,
-            "height_min_ft": 4,
-            "height_max_ft": 5,
-            "height_min_m": 1.21,
-            "height_max_m": 1.52,
-            "desc": "Head high"
-        },
-        {
-            "score": 6,
-            "height_min_ft": 5,
-            "height_max_ft": 6,
-            "height_min_m": 1.52,
-            "height_max_m": 1.82,
-            "desc": "1' overhead"
-        },
-        {
-            "score": 8,
-            "height_min_ft": 6,
-            "height_max_ft": 8,
-            "height_min_m": 1.82,
-            "height_max_m": 2.43,
-            "desc": "3' overhead"
-        },
-        {
-            "score": 10,
-            "height_min_ft": 8,
-            "height_max_ft": 10,
-            "height_min_m": 2.43,
-            "height_max_m": 3.04,
-            "desc": "3' overhead"
-        },
-        {
-            "score": 12,
-            "height_min_ft": 10,
-            "height_max_ft": 12,
-            "height_min_m": 3.04,
-            "height_max_m": 3.65,
-            "desc": "2x overhead"
-        },
-        {
-            "score": 15,
-            "height_min_ft": 12,
-            "height_max_ft": 15,
-            "height_min_m": 3.65,
-            "height_max_m": 1,
-            "desc": "3x overhead"
-        },
-        {
-            "score": 20,
-            "height_min_ft": 15,
-            "height_max_ft": 100,
-            "height_min_m": 4.57,
-            "height_max_m": 100,
-            "desc": "Stupid big"
-        }
-    ]
-    for score in scores:
-        if height > score["height_min_" + metric] and height < score["height_max_" + metric]:
-            return {
-                "score": score["score"],
-                "description": score["desc"],
-                "scale_name": "Face height scale"
-            }
+    return _lookup(FACE_SCALE_TABLE, height, metric)
 
 def get_douglas_scale(height, metric):
-    scores = [
-        {
-            "score": 1,
-            "height_min_ft": 0,
-            "height_max_ft": 0.32,
-            "height_min_m": 0,
-            "height_max_m": 0.10,
-            "desc": "Calm"
-        },
-        {
-            "score": 2,
-            "height_min_ft": 0.32,
-            "height_max_ft": 1.64,
-            "height_min_m": 0.10,
-            "height_max_m": 0.50,
-            "desc": "Smooth"
-        },
-        {
-            "score": 3,
-            "height_min_ft": 1.64,
-            "height_max_ft": 4.10,
-            "height_min_m": 0.5,
-            "height_max_m": 1.25,
-            "desc": "Slight"
-        },
-        {
-            "score": 4,
-            "height_min_ft": 4.10,
-            "height_max_ft": 8.20,
-            "height_min_m": 1.25,
-            "height_max_m": 2.50,
-            "desc": "Moderate"
-        },
-        {
-            "score": 5,
-            "height_min_ft": 8.20,
-            "height_max_ft": 13.12,
-            "height_min_m": 2.50,
-            "height_max_m": 4.00,
-            "desc": "Rough"
-        },
-        {
-            "score": 6,
-            "height_min_ft": 13.12,
-            "height_max_ft": 19.68,
-            "height_min_m": 4.00,
-            "height_max_m": 6.00,
-            "desc": "Very Rough"
-        },
-        {
-            "score": 7,
-            "height_min_ft": 19.68,
-            "height_max_ft": 29.52,
-            "height_min_m": 6.00,
-            "height_max_m": 9.00,
-            "desc": "High"
-        },
-        {
-            "score": 8,
-            "height_min_ft": 29.52,
-            "height_max_ft": 45.93,
-            "height_min_m": 9.00,
-            "height_max_m": 14.00,
-            "desc": "Very high"
-        },
-        {
-            "score": 9,
-            "height_min_ft": 45.93,
-            "height_max_ft": 200.00,
-            "height_min_m": 14.00,
-            "height_max_m": 200.00,
-            "desc": "Phenomenal"
-        }
-    ]
-    for score in scores:
-        if height > score["height_min_" + metric] and height < score["height_max_" + metric]:
-            return {
-                "score": score["score"],
-                "description": score["desc"],
-                "scale_name": "Douglas sea scale"
-            }
+    return _lookup(DOUGLAS_SCALE_TABLE, height, metric)
@@ -1,200 +1,342 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
-import voluptuous as vol # type: ignore
-
-import aiohttp  # type: ignore[import]
 
 from homeassistant.config_entries import ConfigEntry  # type: ignore
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN  # type: ignore
 from homeassistant.core import HomeAssistant  # type: ignore
-from homeassistant.helpers.entity import Entity  # type: ignore
-from homeassistant.helpers.event import async_track_time_interval # type: ignore
+from homeassistant.helpers import entity_registry as er  # type: ignore
+from homeassistant.helpers.entity import Entity, EntityCategory  # type: ignore
+from homeassistant.helpers.restore_state import RestoreEntity  # type: ignore
 
-from .utils import clean_string, get_attributes, split_forecast
+from .api import get_scheduler
+from .const import DOMAIN, MAX_FORECAST_DAYS
+from .ranking import get_ranking
+from .utils import clean_string, get_attributes, get_compact_attributes
 
 _LOGGER = logging.getLogger(__name__)
-SCAN_INTERVAL = timedelta(hours=1)
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
     """Set up the integration from a config entry."""
-    config_data= entry.data
-    entities = [
-        CurrentDaySensor(entry.data),
-        DayForecastSensor(entry.data, 1),
-        DayForecastSensor(entry.data, 2),
-        DayForecastSensor(entry.data, 3),
-        DayForecastSensor(entry.data, 4),
-        DayForecastSensor(entry.data, 5)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    entities = [CurrentDaySensor(entry.data, coordinator)] + [
+        DayForecastSensor(entry.data, coordinator, sensor_day)
+        for sensor_day in range(1, coordinator.forecast_days + 1)
     ]
-    async_add_entities(entities)
-    updater = DataUpdater(entities, config_data, hass)
-    hass.loop.create_task(updater.async_update())
-
-class DataUpdater:
-    """Class to update data for the sensors."""
-
-    def __init__(self, sensors, config, hass):
-        """Initialize the data updater with sensors and configuration."""
-        self.sensors = sensors
-        self.config = config
-        self.hass = hass
-        self._interval = SCAN_INTERVAL
-        async_track_time_interval(hass, self.async_update, self._interval)
-
-    async def async_update(self, now=None):
-        """Fetch new data for the sensors and update their state."""
-        _LOGGER.debug("Swell sensor updating: %s", self.config["location_name"])
-
-        latitude = self.config["location_latitude"]
-        longitude = self.config["location_longitude"]
-        measurement = "imperial"
-        if measurement == "Metres":
-            measurement = "metric"
-        if not self.hass.config.time_zone:
-            time_zone = "auto"
-        else:
-            time_zone = self.hass.config.time_zone
-
-        url = "https://marine-api.open-meteo.com/v1/marine"
-        params = {
-            "latitude": latitude,
-            "longitude": longitude,
-            "current": ["wave_height", "wave_direction", "swell_wave_height"],
-            "hourly": ["wave_height", "wave_period", "swell_wave_height"],
-            "daily": ["wave_height_max", "swell_wave_height_max"],
-            "length_unit": measurement,
-            "timezone": time_zone,
-            "forecast_days": 5,
-            "temporal_resolution": "hourly_3",
-            "models": "best_match"
-        }
-        headers = {
-            "Content-Type": "application/json",
-        }
-        try:
-            async with aiohttp.ClientSession() as session:
-                _LOGGER.debug("Swell sensor updating data: %s", url)
-                async with session.get(url, headers=headers, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        for sensor in self.sensors:
-                            data["forecast_data"] = split_forecast(data)
-                            sensor.update_state(data)
-                    else:
-                        _LOGGER.debug("Swell sensor - Got data: %s", response.status)
-        except aiohttp.ClientConnectorError as e:
-            _LOGGER.error("Error fetching from API: %s", e)
-
-class CurrentDaySensor(Entity):
-    """Representation of a current day sensor."""
+    coordinator.add_sensors(entities)
 
-    def __init__(self, config_data):
-        """Initialize the sensor with configuration data and the sensor day."""
+    # Remove the day sensors left over from a longer horizon
+    registry = er.async_get(hass)
+    for sensor_day in range(coordinator.forecast_days + 1, MAX_FORECAST_DAYS + 1):
+        unique_id = clean_string(entry.data["location_name"]) + "_day" + str(sensor_day) + "_forecast"
+        entity_id = registry.async_get_entity_id("sensor", DOMAIN, unique_id)
+        if entity_id is not None:
+            registry.async_remove(entity_id)
+
+    diagnostics = [
+        UpdateDurationSensor(entry.data, coordinator),
+        ApiRequestsSensor(entry.data, coordinator)
+    ]
+
+    # The ranking covers every location, so only one loaded entry adds its sensor
+    ranking = get_ranking(hass)
+    ranking.entity_adders[entry.entry_id] = async_add_entities
+    summary = []
+    if ranking.sensor_entry_id is None:
+        ranking.sensor_entry_id = entry.entry_id
+        summary.append(BestSessionSensor(ranking))
+
+    def release():
+        ranking.entity_adders.pop(entry.entry_id, None)
+        if ranking.sensor_entry_id != entry.entry_id:
+            return
+        # Hand the sensor over to another loaded entry
+        ranking.sensor_entry_id = None
+        for entry_id, add_entities in ranking.entity_adders.items():
+            ranking.sensor_entry_id = entry_id
+            add_entities([BestSessionSensor(ranking)])
+            break
+
+    entry.async_on_unload(release)
+    async_add_entities(entities + diagnostics + summary)
+
+class SwellForecastSensor(RestoreEntity):
+    """Base of the swell forecast sensors.
+
+    Until the first update, the sensors show the state and attributes they
+    had before Home Assistant restarted.
+    """
+
+    # Written by the coordinator after every update, never polled
+    _attr_should_poll = False
+
+    # Attributes that change on every update and are not compared for writes
+    _volatile_attributes = ()
+
+    def __init__(self, config_data, coordinator):
+        """Initialize the sensor with configuration data."""
         self._state = None
         self._attributes = {}
         self._config_data = config_data
-
-    @property
-    def name(self):
-        """Return the name of the sensor."""
-        return self._config_data["location_name"] + " current"
+        self._coordinator = coordinator
+        self._written = None
+        self.skipped_writes = 0
 
     @property
     def state(self):
         """Return the state of the sensor."""
         return self._state
 
+    @property
+    def available(self):
+        """Return True while the forecast, or the restored state, is not stale."""
+        if self._coordinator.last_attempt is None and self._coordinator.last_success is None:
+            return self._state is not None
+        return self._state is not None and not self._coordinator.is_stale
+
     @property
     def extra_state_attributes(self):
         """Return the extra state attributes of the sensor."""
         return self._attributes
 
+    async def async_added_to_hass(self):
+        """Restore the last state, unless the forecast is already loaded."""
+        await super().async_added_to_hass()
+        if self._state is not None:
+            return
+        last_state = await self.async_get_last_state()
+        if last_state is None or last_state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return
+        self._state = last_state.state
+        self._attributes = dict(last_state.attributes)
+
+    def write_state(self):
+        """Write the state, unless the state and attributes are unchanged.
+
+        Nothing is written before the sensor is added to Home Assistant.
+        """
+
+        if self.hass is None:
+            return
+        attributes = self._attributes
+        if self._volatile_attributes:
+            attributes = {key: value for key, value in attributes.items() if key not in self._volatile_attributes}
+        content = (self.available, self._state, attributes)
+        if content == self._written:
+            self.skipped_writes += 1
+            return
+        self._written = content
+        with self._coordinator.metrics.timer("write"):
+            self.async_write_ha_state()
+
+class CurrentDaySensor(SwellForecastSensor):
+    """Representation of a current day sensor."""
+
+    _volatile_attributes = ("last_updated",)
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return self._config_data["location_name"] + " current"
+
     @property
     def unique_id(self):
         """Return the unique ID of the sensor."""
         return clean_string(self._config_data["location_name"]) + "_current"
 
-    def update_state(self, data):
+    def update_state(self, forecast):
         """Update the state of the sensor with new data."""
 
-        # Define the schema
-        current_schema = vol.Schema({
-            vol.Required("time"): str,
-            vol.Required("swell_wave_height"): vol.Any(int, float),
-            vol.Required("wave_height"): vol.Any(int, float),
-        }, extra=vol.ALLOW_EXTRA)
-
-        current_units = vol.Schema({
-            vol.Required("swell_wave_height"): str,
-            vol.Required("wave_height"): str,
-        }, extra=vol.ALLOW_EXTRA)
-
-        schema = vol.Schema({
-            vol.Required("current"): current_schema,
-            vol.Required("current_units"): current_units
-        }, extra=vol.ALLOW_EXTRA)
-
+        marine = forecast.marine
         current_data = {}
-        try:
-            schema(data)
-            current_data["current_time"] = data["current"]["time"]
-            current_data["last_updated"] = datetime.now().isoformat()  # noqa: DTZ005
-            current_data["swell_height"] = data["current"]["swell_wave_height"]
-            current_data["swell_metric"] = data["current_units"]["swell_wave_height"]
-            current_data["wave_height"] = data["current"]["wave_height"]
-            current_data["wave_metric"] = data["current_units"]["wave_height"]
-            self._state = data["current"]["wave_height"]
-
-            # Set the interval
-            if data["current_units"]["interval"] == "seconds":
-                current_data["update_interval"] = data["current"]["interval"] / 60
-            if data["current_units"]["interval"] == "minutes":
-                current_data["update_interval"] = data["current"]["interval"]
-            current_data["update_interval_metric"] = "mins"
-        except vol.MultipleInvalid as e:
-            _LOGGER.error("Current day schema is not valid: %s", e)
-            self._state = "Invalid data"
+        current_data["current_time"] = marine.current_time
+        current_data["last_updated"] = datetime.now().isoformat()  # noqa: DTZ005
+        current_data["swell_height"] = marine.current_swell_height
+        current_data["swell_metric"] = marine.swell_metric
+        current_data["wave_height"] = marine.current_wave_height
+        current_data["wave_metric"] = marine.wave_metric
+        self._state = marine.current_wave_height
+
+        # Set the interval
+        if marine.current_interval is not None:
+            current_data["update_interval"] = marine.current_interval
+        current_data["update_interval_metric"] = "mins"
 
         # Set the attributes
         self._attributes = current_data
-        self.async_write_ha_state()
+        self.write_state()
 
-class DayForecastSensor(Entity):
+class DayForecastSensor(SwellForecastSensor):
     """Representation of a day forecast sensor."""
 
-    def __init__(self, config_data, sensor_day):
+    # The hourly series is served by the get_forecast service for history
+    _unrecorded_attributes = frozenset({"forecast"})
+
+    def __init__(self, config_data, coordinator, sensor_day):
         """Initialize the sensor with configuration data and the sensor day."""
-        self._state = None
-        self._attributes = {}
-        self._config_data = config_data
+        super().__init__(config_data, coordinator)
         self._sensor_day = sensor_day
+        self._sensor_date_key = None
 
     @property
     def name(self):
         """Return the name of the sensor."""
         return self._config_data["location_name"] + " day" + str(self._sensor_day) + " forecast"
 
+    @property
+    def unique_id(self):
+        """Return the unique ID of the sensor."""
+        return clean_string(self._config_data["location_name"]) + "_day" + str(self._sensor_day) + "_forecast"
+
+    def update_state(self, forecast):
+        """Update the state of the sensor with new data."""
+
+        target_date = forecast.get_date(self._sensor_day)
+        self._state = target_date
+        self._sensor_date = target_date
+        # The attributes are the day's shared summary, which unchanged days carry over
+        self._sensor_date_key = forecast.get_date_key(self._sensor_day)
+        if self._coordinator.compact_attributes:
+            self._attributes = get_compact_attributes(self, forecast)
+        else:
+            self._attributes = get_attributes(self, forecast)
+        self.write_state()
+
+class BestSessionSensor(Entity):
+    """The best surf window across every location, with the full ranking."""
+
+    # Written when the ranking changes, never polled
+    _attr_should_poll = False
+
+    # The ranking is served by the get_best_sessions service for history
+    _unrecorded_attributes = frozenset({"ranking"})
+
+    def __init__(self, ranking):
+        """Initialize the sensor with the shared ranking."""
+        self._ranking = ranking
+        self._remove_listener = None
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return "Swell forecast best session"
+
+    @property
+    def unique_id(self):
+        """Return the unique ID of the sensor."""
+        return DOMAIN + "_best_session"
+
     @property
     def state(self):
-        """Return the state of the sensor."""
-        return self._state
+        """Return the location of the best window."""
+        top = self._ranking.top
+        return top[0]["location_name"] if top else None
 
     @property
     def extra_state_attributes(self):
-        """Return the extra state attributes of the sensor."""
-        return self._attributes
+        """Return the best window and the ranking."""
+        top = self._ranking.top
+        if not top:
+            return {"ranking": []}
+        attributes = {key: value for key, value in top[0].items() if key != "location_name"}
+        attributes["ranking"] = top
+        return attributes
+
+    async def async_added_to_hass(self):
+        """Write the state whenever the ranking changes."""
+        self._remove_listener = self._ranking.add_listener(self.async_write_ha_state)
+
+    async def async_will_remove_from_hass(self):
+        """Stop listening to the ranking."""
+        if self._remove_listener is not None:
+            self._remove_listener()
+
+class DiagnosticSensor(Entity):
+    """Base of the diagnostic sensors, disabled by default."""
+
+    # Written after every update attempt, never polled
+    _attr_should_poll = False
+
+    def __init__(self, config_data, coordinator):
+        """Initialize the sensor with configuration data."""
+        self._config_data = config_data
+        self._coordinator = coordinator
+        self._remove_listener = None
+
+    @property
+    def entity_category(self):
+        """Return the entity category."""
+        return EntityCategory.DIAGNOSTIC
+
+    @property
+    def entity_registry_enabled_default(self):
+        """Return False, these sensors are only enabled when debugging."""
+        return False
+
+    async def async_added_to_hass(self):
+        """Write the state after every update attempt."""
+        self._remove_listener = self._coordinator.add_listener(self.async_write_ha_state)
+
+    async def async_will_remove_from_hass(self):
+        """Stop listening to the coordinator."""
+        if self._remove_listener is not None:
+            self._remove_listener()
+
+class UpdateDurationSensor(DiagnosticSensor):
+    """Duration of the last update, with the duration of each stage."""
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return self._config_data["location_name"] + " update duration"
 
     @property
     def unique_id(self):
         """Return the unique ID of the sensor."""
-        return clean_string(self._config_data["location_name"]) + "_day" + str(self._sensor_day) + "_forecast"
+        return clean_string(self._config_data["location_name"]) + "_update_duration"
 
-    def update_state(self, data):
-        """Update the state of the sensor with new data."""
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement."""
+        return "ms"
 
-        date_obj = datetime.fromisoformat(data["current"]["time"].replace("Z", "+00:00"))
-        target_date = date_obj + timedelta(days=self._sensor_day - 1)
-        self._sensor_date = target_date
-        self._sensor_data = data["forecast_data"]
-        self._state = target_date
-        self._attributes = get_attributes(self, data)
-        self.async_write_ha_state()
+    @property
+    def state(self):
+        """Return the duration of the last update."""
+        return self._coordinator.metrics.get_last_ms("update")
+
+    @property
+    def extra_state_attributes(self):
+        """Return the last duration of each stage and the update counters."""
+        metrics = self._coordinator.metrics
+        attributes = {stage + "_ms": metrics.get_last_ms(stage) for stage in metrics.stages}
+        attributes.update(metrics.counters)
+        attributes["skipped_writes"] = self._coordinator.skipped_writes
+        return attributes
+
+class ApiRequestsSensor(DiagnosticSensor):
+    """Number of marine API requests made by the integration."""
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return self._config_data["location_name"] + " API requests"
+
+    @property
+    def unique_id(self):
+        """Return the unique ID of the sensor."""
+        return clean_string(self._config_data["location_name"]) + "_api_requests"
+
+    @property
+    def state(self):
+        """Return the number of requests made by every entry."""
+        return get_scheduler(self.hass).metrics.counters.get("requests", 0)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the fetch counters, status codes and request timings."""
+        metrics = get_scheduler(self.hass).metrics
+        attributes = dict(metrics.counters)
+        attributes["status_codes"] = {str(status): count for status, count in metrics.status_codes.items()}
+        attributes["request_ms"] = metrics.get_last_ms("request")
+        attributes["decode_ms"] = metrics.get_last_ms("decode")
+        return attributes
@@ -0,0 +1,137 @@
+"""Incremental decoding of marine API responses into compact columns."""
+
+from array import array
+import codecs
+import json
+
+def to_array(values):
+    """Store a column of heights as doubles, with missing values as NaN."""
+    if isinstance(values, array) and values.typecode == "d":
+        return values
+    try:
+        return array("d", values)
+    except TypeError:
+        return array("d", (float("nan") if value is None else value for value in values))
+
+def compact_location(data):
+    """Replace the hourly number lists of a location with array('d') columns.
+
+    Args:
+        data (dict): The marine API response of a single location.
+
+    Returns:
+        dict: The same response, with every hourly column except the times
+        stored as doubles.
+
+    """
+
+    hourly = data.get("hourly") if isinstance(data, dict) else None
+    if isinstance(hourly, dict):
+        for key, values in hourly.items():
+            if key != "time" and isinstance(values, list):
+                try:
+                    hourly[key] = to_array(values)
+                except TypeError:
+                    # Left as is for validation to report
+                    pass
+    return data
+
+class MarineStreamDecoder:
+    """Decode a marine API response as its body arrives.
+
+    A multi-location response is a JSON array of location objects. Each
+    location is decoded as soon as its object is complete and its hourly
+    columns are compacted, so only one location is held as a tree of Python
+    objects at a time, rather than the whole batch.
+    """
+
+    def __init__(self):
+        """Initialize an empty decoder."""
+        self.locations = []
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._array = None
+        self._done = False
+
+    def feed(self, chunk):
+        """Decode the locations completed by a chunk of the body.
+
+        Args:
+            chunk (bytes): The next part of the response body.
+
+        Raises:
+            ValueError: The body is not a location object or an array of them.
+
+        """
+
+        self._buffer += self._text.decode(chunk)
+        if self._array is None:
+            start = self._skip_whitespace(0)
+            if start == len(self._buffer):
+                return
+            self._array = self._buffer[start] == "["
+            if not self._array:
+                if self._buffer[start] != "{":
+                    raise ValueError("Expected a JSON object or array")
+                # A single location is decoded whole on close
+                return
+            self._buffer = self._buffer[start + 1:]
+        if self._array:
+            self._decode_array()
+
+    def close(self):
+        """Finish decoding.
+
+        Returns:
+            list: The decoded location of each entry of an array response, or
+            a list holding the single location of an object response.
+
+        Raises:
+            ValueError: The body is incomplete or not valid JSON.
+
+        """
+
+        self._buffer += self._text.decode(b"", final=True)
+        if self._array is None:
+            raise ValueError("Empty response body")
+        if not self._array:
+            data, end = self._decoder.raw_decode(self._buffer, self._skip_whitespace(0))
+            if self._skip_whitespace(end) != len(self._buffer):
+                raise ValueError("Extra data after the JSON object")
+            return [compact_location(data)]
+        self._decode_array()
+        if not self._done:
+            # Decode what is left to raise the underlying error
+            self._decoder.raw_decode(self._buffer, self._skip_whitespace(0))
+            raise ValueError("Incomplete JSON array")
+        return self.locations
+
+    def _decode_array(self):
+        """Decode every complete location at the start of the buffer."""
+        buffer = self._buffer
+        position = self._skip_whitespace(0)
+        while position < len(buffer) and not self._done:
+            char = buffer[position]
+            if char == "]":
+                self._done = True
+                position += 1
+                break
+            if char == ",":
+                position = self._skip_whitespace(position + 1)
+                continue
+            try:
+                data, end = self._decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The location is still arriving
+                break
+            self.locations.append(compact_location(data))
+            position = self._skip_whitespace(end)
+        self._buffer = buffer[position:]
+
+    def _skip_whitespace(self, position):
+        """Get the position of the next character that is not whitespace."""
+        buffer = self._buffer
+        while position < len(buffer) and buffer[position] in " \t\n\r":
+            position += 1
+        return position
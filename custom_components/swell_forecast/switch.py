@@ -0,0 +1,77 @@
+import logging
+
+from homeassistant.components.switch import SwitchEntity  # type: ignore
+from homeassistant.config_entries import ConfigEntry  # type: ignore
+from homeassistant.core import HomeAssistant  # type: ignore
+from homeassistant.helpers.entity import EntityCategory  # type: ignore
+
+from .const import DOMAIN
+from .utils import clean_string
+
+_LOGGER = logging.getLogger(__name__)
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
+    """Set up the integration from a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities([ProfileUpdateSwitch(entry.data, coordinator)])
+
+class ProfileUpdateSwitch(SwitchEntity):
+    """Debug switch that profiles a single update with cProfile.
+
+    Turning it on refreshes the forecast under the profiler. The statistics
+    are logged and added to the diagnostics, then the switch turns off.
+    """
+
+    # Written after every update attempt, never polled
+    _attr_should_poll = False
+
+    def __init__(self, config_data, coordinator):
+        """Initialize the switch with configuration data."""
+        self._config_data = config_data
+        self._coordinator = coordinator
+        self._remove_listener = None
+
+    @property
+    def name(self):
+        """Return the name of the switch."""
+        return self._config_data["location_name"] + " profile update"
+
+    @property
+    def unique_id(self):
+        """Return the unique ID of the switch."""
+        return clean_string(self._config_data["location_name"]) + "_profile_update"
+
+    @property
+    def entity_category(self):
+        """Return the entity category."""
+        return EntityCategory.DIAGNOSTIC
+
+    @property
+    def entity_registry_enabled_default(self):
+        """Return False, the switch is only enabled when debugging."""
+        return False
+
+    @property
+    def is_on(self):
+        """Return True while the next update will be profiled."""
+        return self._coordinator.profile_next_update
+
+    async def async_added_to_hass(self):
+        """Write the state after every update attempt."""
+        self._remove_listener = self._coordinator.add_listener(self.async_write_ha_state)
+
+    async def async_will_remove_from_hass(self):
+        """Stop listening to the coordinator."""
+        if self._remove_listener is not None:
+            self._remove_listener()
+
+    async def async_turn_on(self, **kwargs):
+        """Profile the next update and start it now."""
+        self._coordinator.profile_next_update = True
+        self.async_write_ha_state()
+        self.hass.async_create_task(self._coordinator.async_refresh(force=True))
+
+    async def async_turn_off(self, **kwargs):
+        """Cancel profiling of the next update."""
+        self._coordinator.profile_next_update = False
+        self.async_write_ha_state()
@@ -0,0 +1,107 @@
+"""Shared, bounded caches of parsed forecast timestamps.
+
+Every location of a batch gets the same hourly times, and consecutive
+updates mostly repeat them, so each time axis and timestamp is parsed once
+and reused until it falls out of the LRU cache.
+"""
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from .const import TIME_AXIS_CACHE_SIZE, TIMESTAMP_CACHE_SIZE
+
+def _hour_label(hour):
+    """Format an hour of the day as a 12-hour label, such as "3pm"."""
+    if hour == 0:
+        return "12am"
+    if hour == 12:
+        return "12pm"
+    if hour > 12:
+        return str(hour - 12) + "pm"
+    return str(hour) + "am"
+
+HOUR_LABELS = tuple(_hour_label(hour) for hour in range(24))
+
+class TimeAxis:
+    """The days and display labels of an hourly time series."""
+
+    __slots__ = ("bounds", "date_keys", "labels", "starts")
+
+    def __init__(self, times):
+        """Group ISO 8601 'YYYY-MM-DDTHH:MM' times by day.
+
+        Args:
+            times (tuple): The time of each slot, in order.
+
+        """
+
+        date_keys = []
+        bounds = []
+        labels = []
+        for index, time in enumerate(times):
+            # Slicing avoids a datetime per slot
+            date_key = time[0:4] + time[5:7] + time[8:10]
+            if not date_keys or date_keys[-1] != date_key:
+                if bounds:
+                    bounds[-1] = (bounds[-1][0], index)
+                date_keys.append(date_key)
+                bounds.append((index, index))
+            labels.append(HOUR_LABELS[int(time[11:13])])
+        if bounds:
+            bounds[-1] = (bounds[-1][0], len(labels))
+
+        self.date_keys = tuple(date_keys)
+        self.bounds = tuple(bounds)
+        self.labels = tuple(labels)
+        self.starts = tuple(start for start, _ in bounds)
+
+@lru_cache(maxsize=TIME_AXIS_CACHE_SIZE)
+def _get_time_axis(times):
+    """Build the time axis of a tuple of times."""
+    return TimeAxis(times)
+
+def get_time_axis(times):
+    """Get the time axis of an hourly series, parsing it once per distinct series.
+
+    Args:
+        times (Sequence): The ISO 8601 time of each slot.
+
+    Returns:
+        TimeAxis: The shared, read-only time axis.
+
+    """
+
+    return _get_time_axis(tuple(times))
+
+@lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def parse_timestamp(value):
+    """Parse an ISO 8601 timestamp from the marine API, once per distinct value."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+@lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def get_forecast_dates(current_time, days):
+    """Get the dates and date keys of the forecast days starting at a time.
+
+    Args:
+        current_time (str): The ISO 8601 time of the current reading.
+        days (int): The number of forecast days.
+
+    Returns:
+        tuple: The datetimes of the days and their 'YYYYMMDD' keys.
+
+    """
+
+    start = parse_timestamp(current_time)
+    dates = tuple(start + timedelta(days=day) for day in range(days))
+    return dates, tuple(date.strftime("%Y%m%d") for date in dates)
+
+def cache_info():
+    """Get the hit and miss counts of the caches, for diagnostics."""
+    return {
+        name: cached.cache_info()._asdict()
+        for name, cached in (
+            ("time_axes", _get_time_axis),
+            ("timestamps", parse_timestamp),
+            ("forecast_dates", get_forecast_dates),
+        )
+    }
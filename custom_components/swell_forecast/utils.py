@@ -1,9 +1,7 @@
-from datetime import datetime
 import logging
 import re
 
-import aiohttp  # type: ignore  # noqa: PGH003
-from .scoring import get_wave_score
+from .api import build_params, get_scheduler
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -22,148 +20,81 @@ def clean_string(input_string):
     input_string = input_string.replace(" ", "_")
     return re.sub(r"[^a-z0-9_]", "", input_string)
 
-def optimal_wave(forecast, wave):
-    """Clean the input string by converting it to lowercase, replacing spaces with underscores, and removing non-alphanumeric characters.
+def valid_coordinates(location_lat, location_long):
+    """Check a latitude and longitude locally, without calling the API.
 
     Args:
-        forecast (obj): Forecast object
-        wave (obj): Wave object
+        location_lat (str): The location latitude to check.
+        location_long (str): The location longitude to check.
 
     Returns:
-        obj: An object of the optimal wave.
+        bool: True if both are numbers within range, False otherwise.
 
     """
 
     try:
-        max_wave = None
-        max_swell = None
-        max_wave_height = 0
-        max_wave_time = 0
-        max_swell_height = 0
-        max_swell_time = 0
-        wave_height_metric = wave["hourly_units"]["wave_height"]
-        swell_height_metric = wave["hourly_units"]["swell_wave_height"]
-        for hourly in forecast:
-            wave_height = hourly["wave_height"]
-            swell_height = hourly["swell_height"]
-            if wave_height > max_wave_height:
-                max_wave_height = wave_height
-                max_wave_time = hourly["time"]
-                max_wave = str(wave_height) +  wave_height_metric + " @ " + hourly["time"]
-            if swell_height > max_swell_height:
-                max_swell_height = swell_height
-                max_swell_time = hourly["time"]
-                max_swell = str(swell_height) +  swell_height_metric + " @ " + hourly["time"]
-        return {
-            "wave": {
-                "max_height": max_wave_height,
-                "max_time": max_wave_time,
-                "max": max_wave,
-                "score": get_wave_score(max_wave_height, wave_height_metric)
-            },
-            "swell": {
-                "max_height": max_swell_height,
-                "max_time": max_swell_time,
-                "max": max_swell,
-                "score": get_wave_score(max_swell_height, swell_height_metric)
-            }
-        }
-    except aiohttp.ClientConnectorError as e:
-        _LOGGER.error("Error getting the optimal wave: %s", e)
-
-def split_forecast(forecast):
-    """Check if an entity with the given unique ID already exists."""
-
-    dates_forecast = {}
-    for index, hourly in enumerate(forecast["hourly"]["time"]):
-        date_obj = datetime.fromisoformat(hourly.replace("Z", "+00:00"))
-        time_value = str(date_obj.hour) + "am"
-        if date_obj.hour == 12:
-            time_value = "12pm"
-        if date_obj.hour > 12:
-            time_value = str(date_obj.hour - 12) + "pm"
-        if date_obj.hour == 0:
-            time_value = "12am"
-
-        date_key = date_obj.strftime("%Y%m%d")
-        if date_key not in dates_forecast:
-            dates_forecast[date_key] = []
-        day_data = {}
-        day_data["time"] = time_value
-        day_data["wave_height"] = round(forecast["hourly"]["wave_height"][index], 2)
-        day_data["swell_height"] = round(forecast["hourly"]["swell_wave_height"][index], 2)
-
-        dates_forecast[date_key].append(day_data)
-
-    return dates_forecast
-
-def get_date_key(iso_date):
-    """Get a date key from an ISO formatted date string.
+        latitude = float(location_lat)
+        longitude = float(location_long)
+    except (TypeError, ValueError):
+        return False
+    return -90 <= latitude <= 90 and -180 <= longitude <= 180
+
+async def check_location(hass, config):
+    """Check that the marine API has a forecast for a location.
+
+    The response is stored in the shared cache under the location's own
+    parameters, so the first update of the new entry reuses it rather than
+    downloading it again.
 
     Args:
-        iso_date (str): The ISO formatted date string.
+        hass (HomeAssistant): The Home Assistant instance.
+        config (dict): The config entry data to check.
 
     Returns:
-        str: The date key in the format 'YYYYMMDD'.
+        str: The config flow error key, or None if the location is valid.
 
     """
 
-    date_obj = datetime.fromisoformat(iso_date.replace("Z", "+00:00"))
-    return date_obj.strftime("%Y%m%d")
+    if not valid_coordinates(config["location_latitude"], config["location_longitude"]):
+        return "invalid_coordinates"
 
-async def check_location(location_lat, location_long):
-    """Check if the given location ID is valid.
+    params = build_params(config, hass.config.time_zone)
+    _LOGGER.info("Checking location: %s / %s", params["latitude"], params["longitude"])
+    scheduler = get_scheduler(hass)
+    await scheduler.cache.async_load()
+    data = await scheduler.async_fetch(params)
+    if data is None:
+        return "invalid_location"
+    # Points on land are answered with an empty forecast
+    if all(height is None or height != height for height in data.get("hourly", {}).get("wave_height", [])):
+        return "not_ocean"
+    return None
+
+def get_attributes(self, forecast):
+    """Get attributes from the parsed forecast.
 
     Args:
-        location_lat (str): The location latitude to check.
-        location_long (str): The location longitude to check.
+        self: The instance of the class.
+        forecast (ParsedForecast): The forecast parsed once for this update.
 
     Returns:
-        bool: True if the location ID is valid, False otherwise.
+        MappingProxyType: The read-only wave height, forecast, and other
+        attributes, shared by every sensor showing the same day.
 
     """
 
-    params = {
-            "latitude": location_lat,
-            "longitude": location_long,
-            "hourly": ["wave_height", "wave_period", "swell_wave_height"],
-            "daily": ["wave_height_max", "swell_wave_height_max"],
-            "temporal_resolution": "hourly_3",
-            "models": "best_match"
-        }
-    url = "https://marine-api.open-meteo.com/v1/marine"
-    headers = {
-        "Content-Type": "application/json",
-    }
-    try:
-        async with aiohttp.ClientSession() as session:
-            _LOGGER.info("Checking location: %s / %s", location_lat, location_long)
-            async with session.get(url, headers=headers, params=params) as response:
-                if response.status == 200:
-                   return True
-                _LOGGER.info("Got data: %s", response.status)
-                return False
-    except aiohttp.ClientConnectorError as e:
-        _LOGGER.info("Error: %s", e)
-        return False
-    return True
+    return forecast.get_summary(self._sensor_date_key)
 
-def get_attributes(self, wave):
-    """Get attributes from the wave data.
+def get_compact_attributes(self, forecast):
+    """Get summary attributes from the parsed forecast, without the hourly series.
 
     Args:
         self: The instance of the class.
-        wave (dict): The wave data containing hourly and current wave information.
+        forecast (ParsedForecast): The forecast parsed once for this update.
 
     Returns:
-        dict: A dictionary containing wave height, forecast, and other attributes.
+        MappingProxyType: The read-only peak wave and swell numbers of the day.
 
     """
 
-    target_date = get_date_key(self._sensor_date.isoformat())
-    response = {}
-    response["forecast"] = wave["forecast_data"][target_date]
-    response["height_metric"] = wave["current_units"]["wave_height"]
-    response["optimal_wave"] = optimal_wave(response["forecast"], wave)
-    response["updated"] = self._state
-    return response
+    return forecast.get_summary(self._sensor_date_key, compact=True)
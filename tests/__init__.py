@@ -0,0 +1 @@
+"""Tests for the Swell Forecast integration."""
@@ -0,0 +1,37 @@
+"""Tests of the forecast and observed wave height history."""
+
+import pytest
+
+from custom_components.swell_forecast.history import LocationHistory
+
+DAY = 24 * 3600
+
+@pytest.mark.asyncio
+async def test_skill_matches_quarter_hour_readings_to_three_hourly_slots(hass):
+    """Readings between slots are compared with the slot they fall in."""
+    history = LocationHistory(hass, "test")
+    start = 10 * DAY
+    for slot in range(8):
+        history.forecast.append(0.0, start + slot * 3 * 3600, 1.5, 1.0)
+    for quarter in range(8 * 3 * 4):
+        observed_at = start + quarter * 900
+        history.observed.append(observed_at, observed_at, 1.25, 1.0)
+
+    skill = history.get_skill(24)
+
+    assert skill["count"] == 96
+    assert skill["wave_mae"] == 0.25
+    assert skill["wave_bias"] == 0.25
+    assert skill["swell_bias"] == 0.0
+
+@pytest.mark.asyncio
+async def test_skill_ignores_readings_outside_the_forecast(hass):
+    """Readings before the first slot or a slot past the last are not matched."""
+    history = LocationHistory(hass, "test")
+    start = 10 * DAY
+    for slot in range(2):
+        history.forecast.append(0.0, start + slot * 3 * 3600, 1.5, 1.0)
+    for observed_at in (start - 900, start + 6 * 3600, start + 3600):
+        history.observed.append(observed_at, observed_at, 1.25, 1.0)
+
+    assert history.get_skill(24)["count"] == 1